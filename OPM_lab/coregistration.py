@@ -0,0 +1,173 @@
+"""
+Batch co-registration of OPM recordings.
+
+Runs add_dig_montage, add_sensor_layout and add_device_to_head for every session in a manifest, in parallel,
+and writes the updated measurement info and the device-to-head transform of each session.
+
+Usage:
+    python -m OPM_lab.coregistration manifest.json --n-jobs 8
+
+The manifest is a JSON list with one entry per session. Relative paths are relative to the manifest:
+    [
+        {
+            "fif": "sub-01/raw.fif",                      # the OPM recording
+            "digitisation": "sub-01/digitisation.npz",    # output of Digitiser.save_digitisation (.csv, .npz, .parquet, .h5)
+            "depth": "sub-01/depth_measurements.csv",     # columns "sensor" and "depth" (mm)
+            "rename": {"00:01-BZ_CL": "FL3"},             # optional, channel name -> helmet slot label
+            "output": "sub-01/coreg",                     # optional, defaults to the directory of the fif file
+            "unit": "cm"                                  # optional, unit of the digitisation, defaults to "cm"
+        }
+    ]
+"""
+import argparse
+import json
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+import mne
+import pandas as pd
+from .mne_integration import add_dig_montage, add_sensor_layout, add_device_to_head
+from .digitise.digitisation_io import load_digitisation
+from .sensor_position import OPMSensorLayout
+
+
+def read_manifest(manifest_path: Path):
+    """
+    Read a manifest and resolve the paths of every session relative to the manifest.
+
+    Returns:
+        list[dict]: One dictionary per session.
+    """
+    manifest_path = Path(manifest_path)
+    with manifest_path.open() as file:
+        sessions = json.load(file)
+
+    base_dir = manifest_path.parent
+    for session in sessions:
+        for key in ["fif", "digitisation", "depth", "output"]:
+            if session.get(key) is not None:
+                session[key] = base_dir / session[key]
+
+    return sessions
+
+
+def output_paths(session: dict):
+    """
+    Returns:
+        tuple: Paths of the measurement info and the device-to-head transform written for a session.
+    """
+    fif = Path(session["fif"])
+    output_dir = Path(session.get("output") or fif.parent)
+    stem = fif.name.removesuffix(".fif")
+
+    return output_dir / f"{stem}-info.fif", output_dir / f"{stem}-trans.fif"
+
+
+def is_up_to_date(session: dict):
+    """
+    Whether the outputs of a session exist and are newer than all of its inputs.
+    """
+    outputs = output_paths(session)
+    if not all(path.exists() for path in outputs):
+        return False
+
+    inputs_modified = max(Path(session[key]).stat().st_mtime for key in ["fif", "digitisation", "depth"])
+    return min(path.stat().st_mtime for path in outputs) > inputs_modified
+
+
+def coregister_session(session: dict, overwrite: bool = False, helmet_template=None):
+    """
+    Co-register one session and write the updated measurement info and device-to-head transform.
+
+    Args:
+        session (dict): Entry of the manifest, see read_manifest.
+        overwrite (bool): Process the session even if its outputs are up to date.
+        helmet_template (HelmetTemplate): The helmet the sensors were placed in. Defaults to FL_alpha1_helmet.
+
+    Returns:
+        dict: The fif path, the status ("done" or "skipped") and the channels missing from the recording.
+    """
+    fif = Path(session["fif"])
+    if not overwrite and is_up_to_date(session):
+        return {"fif": str(fif), "status": "skipped", "missing": []}
+
+    if helmet_template is None:
+        from .sensor_position import FL_alpha1_helmet as helmet_template
+
+    raw = mne.io.read_raw(fif, preload=False, verbose=False)
+    if session.get("rename"):
+        raw.rename_channels(session["rename"])
+
+    # split by type and converted to metres once, for both add_dig_montage and add_device_to_head
+    points = load_digitisation(session["digitisation"], unit=session.get("unit", "cm"))
+    depths = pd.read_csv(session["depth"])
+
+    sensor_layout = OPMSensorLayout(
+        label=list(depths["sensor"]),
+        depth=depths["depth"].to_numpy(dtype=float),
+        helmet_template=helmet_template
+    )
+
+    add_dig_montage(raw, points)
+    layout_report = add_sensor_layout(raw, sensor_layout)
+    add_device_to_head(raw, points)
+
+    info_path, trans_path = output_paths(session)
+    info_path.parent.mkdir(parents=True, exist_ok=True)
+    mne.io.write_info(info_path, raw.info, overwrite=True)
+    mne.write_trans(trans_path, raw.info["dev_head_t"], overwrite=True)
+
+    return {"fif": str(fif), "status": "done", "missing": layout_report["missing"]}
+
+
+def _init_worker():
+    # load the helmet template once per worker, its arrays are memory-mapped and shared between the workers
+    from .sensor_position import FL_alpha1_helmet
+    FL_alpha1_helmet.get_chs_pos()
+
+
+def coregister_sessions(sessions: list[dict], n_jobs: int = 1, overwrite: bool = False):
+    """
+    Co-register sessions in parallel on a process pool.
+
+    Args:
+        sessions (list[dict]): Sessions as returned by read_manifest.
+        n_jobs (int): The number of worker processes.
+        overwrite (bool): Process sessions even if their outputs are up to date.
+
+    Returns:
+        list[dict]: The result of each session, with status "failed" and the error if it raised.
+    """
+    results = []
+    with ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_worker) as executor:
+        futures = {
+            executor.submit(coregister_session, session, overwrite): session for session in sessions
+        }
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except Exception as e:
+                result = {"fif": str(futures[future]["fif"]), "status": "failed", "error": repr(e)}
+
+            print(f"{result['status']:>8}: {result['fif']}")
+            results.append(result)
+
+    return results
+
+
+def main(argv: list[str] = None):
+    parser = argparse.ArgumentParser(description="Co-register the OPM sessions listed in a manifest.")
+    parser.add_argument("manifest", type=Path, help="JSON manifest of the sessions.")
+    parser.add_argument("--n-jobs", type=int, default=1, help="Number of worker processes.")
+    parser.add_argument("--overwrite", action="store_true", help="Process sessions even if their outputs are up to date.")
+    args = parser.parse_args(argv)
+
+    results = coregister_sessions(read_manifest(args.manifest), n_jobs=args.n_jobs, overwrite=args.overwrite)
+
+    counts = {status: sum(result["status"] == status for result in results) for status in ["done", "skipped", "failed"]}
+    print(", ".join(f"{count} {status}" for status, count in counts.items()))
+
+    return 1 if counts["failed"] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,10 +1,52 @@
 __all__ = [
     "Digitiser",
-    "FastrakConnector"
+    "HeadlessDigitiser",
+    "FastrakConnector",
+    "AsyncFastrakConnector",
+    "FrameRingBuffer",
+    "FastrakEmulator",
+    "AudioFeedback",
+    "SpatialHashFilter",
+    "DigitisationJournal",
+    "DigitisedPoints",
+    "load_digitisation",
+    "read_digitisation",
+    "save_digitisation",
+    "StageTimer"
 ]
 from .digitising import (
     Digitiser
 )
+from .headless import (
+    HeadlessDigitiser
+)
 from .fastrak_connector import (
     FastrakConnector
+)
+from .async_fastrak_connector import (
+    AsyncFastrakConnector
+)
+from .ring_buffer import (
+    FrameRingBuffer
+)
+from .emulator import (
+    FastrakEmulator
+)
+from .audio import (
+    AudioFeedback
+)
+from .decimation import (
+    SpatialHashFilter
+)
+from .journal import (
+    DigitisationJournal
+)
+from .digitisation_io import (
+    DigitisedPoints,
+    load_digitisation,
+    read_digitisation,
+    save_digitisation
+)
+from .instrumentation import (
+    StageTimer
 )
\ No newline at end of file
@@ -0,0 +1,211 @@
+import asyncio
+import inspect
+import numpy as np
+from .fastrak_connector import FastrakConnector, split_frame
+
+
+class AsyncFastrakConnector(FastrakConnector):
+    # reads never block, as they are only done when data is available
+    _serial_timeout = 0
+
+    def __init__(self, usb_port: str, **kwargs):
+        """
+        An asyncio variant of FastrakConnector. Incoming bytes are collected by a reader callback registered on the
+        serial file descriptor, so waiting for the device never blocks the event loop. Requires an event loop that
+        supports add_reader (the default loop on Linux and macOS).
+
+        The receiver roles, output format, read_timeout and timer work as in FastrakConnector, and the methods that
+        talk to the device are coroutines. Frames are read with frames() instead of start_streaming().
+
+        Args:
+            usb_port (str): The USB port to which the Polhemus FASTRAK is connected.
+            **kwargs: The arguments of FastrakConnector, e.g. output_format or styluses.
+
+        Attributes:
+            stream_error (Exception): The error that stopped the reader callback (e.g. the device was disconnected),
+                raised by every following read.
+
+        Methods:
+            open(): Starts collecting incoming data on the running event loop.
+            close(): Stops the continuous output of the device, stops collecting data and closes the serial port.
+            prepare_for_digitisation(): Prepares the device for digitisation use.
+            get_stylus_positions(): Computes the positions of the styluses relative to the head receiver.
+            frames(): Async iterator over decoded frames.
+
+        Example:
+            async with AsyncFastrakConnector("/dev/ttyUSB0") as connector:
+                await connector.prepare_for_digitisation()
+                async for sensor_data, position in connector.frames():
+                    ...
+        """
+        super().__init__(usb_port, **kwargs)
+        self.n_receivers = 0
+
+        self._data_received = None
+        self._loop = None
+
+    async def __aenter__(self):
+        self.open()
+        return self
+
+    async def __aexit__(self, *exc):
+        self.close()
+
+    def open(self):
+        """
+        Registers the reader callback on the running event loop.
+        """
+        if self._loop is not None:
+            return
+
+        self._loop = asyncio.get_running_loop()
+        self._data_received = asyncio.Event()
+        self._loop.add_reader(self.serialobj.fileno(), self._on_readable)
+
+    def close(self):
+        if self.serialobj.is_open and self.stream_error is None:
+            self._stop_continuous_output()
+
+        if self._loop is not None:
+            self._loop.remove_reader(self.serialobj.fileno())
+            self._loop = None
+        self.serialobj.close()
+
+    def _on_readable(self):
+        try:
+            self._buffer += self.serialobj.read(max(self.serialobj.in_waiting, 1))
+        except Exception as e: # e.g. the device was disconnected, stop instead of being called again right away
+            self.stream_error = e
+            print(f"Reading from the FASTRAK stopped: {e}")
+            self._loop.remove_reader(self.serialobj.fileno())
+        self._data_received.set()
+
+    async def read_frame(self, timeout:float=None):
+        """
+        Waits until a complete frame has been received, without blocking the event loop. Bytes that do not belong
+        to a valid frame are discarded, see split_frame.
+
+        Args:
+            timeout (float): Seconds to wait before raising a TimeoutError. None waits indefinitely.
+
+        Raises:
+            RuntimeError: If the reader callback stopped on an error, see stream_error.
+        """
+        self.open()
+        deadline = None if timeout is None else self._loop.time() + timeout
+
+        while True:
+            frame, n_discarded = split_frame(self._buffer, self.n_receivers, self.data_length, self.output_format)
+            if n_discarded:
+                self._count_discarded(n_discarded)
+            if frame is not None:
+                return frame
+
+            if self.stream_error is not None:
+                raise RuntimeError(f"Reading from the FASTRAK stopped on an error: {self.stream_error}") from self.stream_error
+
+            self._data_received.clear()
+            remaining = None if deadline is None else deadline - self._loop.time()
+            try:
+                await asyncio.wait_for(self._data_received.wait(), remaining)
+            except asyncio.TimeoutError:
+                raise TimeoutError(
+                    f"No complete frame received from the FASTRAK within {timeout} s ({len(self._buffer)} bytes pending)"
+                ) from None
+
+    async def send_serial_command(self, command:bytes, sleep_time:float=0.1):
+        self._write_command(command)
+        await asyncio.sleep(sleep_time)
+
+    async def count_receivers(self):
+        """
+        Queries the number of active receivers, by counting the records returned for a single 'P' command.
+        """
+        self.clear_old_data()
+        await self.send_serial_command(b"P")
+
+        n_receivers = len([line for line in bytes(self._buffer).splitlines() if line.strip()])
+        self.clear_old_data()
+        self._set_receiver_count(n_receivers)
+
+    def clear_old_data(self):
+        """
+        Discards all received data that has not been read.
+        """
+        self._buffer.clear()
+
+    async def prepare_for_digitisation(self):
+        self.open()
+        for step in self._prepare_steps():
+            result = step()
+            if inspect.isawaitable(result):
+                await result
+
+    async def read_sensor_data(self, timeout:float=None):
+        """
+        Reads one record from each receiver, see FastrakConnector.read_sensor_data().
+
+        Returns:
+            np.ndarray: Array of shape (7, n_receivers).
+        """
+        self.open()
+        if timeout is None:
+            timeout = self.read_timeout
+        deadline = None if timeout is None else self._loop.time() + timeout
+
+        while True:
+            remaining = None if deadline is None else max(0, deadline - self._loop.time())
+            with self.timer.stage("serial_wait"):
+                frame = await self.read_frame(remaining)
+            self.timer.frame()
+
+            with self.timer.stage("parse"):
+                try:
+                    return self.decode_frame(frame, self.output_format)
+                except ValueError: # a corrupted field, read the next frame
+                    self._count_discarded(1)
+
+    async def get_positions_relative_to_head_receiver(self, timeout:float=None):
+        sensor_data = await self.read_sensor_data(timeout)
+        return sensor_data, self._relative_positions(sensor_data)
+
+    async def get_position_relative_to_head_receiver(self, timeout:float=None):
+        sensor_data, positions = await self.get_positions_relative_to_head_receiver(timeout)
+        return sensor_data, positions[self.stylus_receiver]
+
+    async def get_stylus_positions(self, timeout:float=None):
+        sensor_data, positions = await self.get_positions_relative_to_head_receiver(timeout)
+        return sensor_data, positions[self.styluses]
+
+    def start_streaming(self, *args, **kwargs):
+        raise NotImplementedError("AsyncFastrakConnector does not stream on a thread, iterate over frames() instead.")
+
+    def _stop_continuous_output(self):
+        if self._continuous_output:
+            self._write_command(b"c")
+            self._continuous_output = False
+            self.clear_old_data()
+
+    async def frames(self, continuous_output:bool=True):
+        """
+        Async iterator over the frames from the device. Continuous output is stopped when the iteration ends or, at
+        the latest, when the connector is closed.
+
+        Args:
+            continuous_output (bool): Whether to put the device in continuous output mode while iterating. If False,
+                the frames the device outputs on its own (e.g. when the stylus is pressed) are yielded.
+
+        Yields:
+            tuple: sensor_data (7, n_receivers) and the stylus position relative to the head reference, shape (3,),
+            or (n_styluses, 3) with several styluses.
+        """
+        if continuous_output:
+            self._continuous_output = True
+            await self.send_serial_command(b"C", sleep_time=0)
+        try:
+            while True:
+                sensor_data, positions = await self.get_stylus_positions()
+                yield sensor_data, positions[0] if len(self.styluses) == 1 else positions
+        finally:
+            if self.serialobj.is_open and self.stream_error is None:
+                self._stop_continuous_output()
@@ -0,0 +1,224 @@
+import queue
+import shutil
+import subprocess
+import tempfile
+import threading
+import wave
+from pathlib import Path
+import numpy as np
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+SOUND_DIR = BASE_DIR / "soundfiles"
+
+SOUND_FILES = {"beep": "beep.wav", "wrong": "wrongbeep.wav", "done": "done.mp3"}
+
+# command line players, tried in order, with the arguments needed to play a file without opening a window
+PLAYERS = {
+    "afplay": [],
+    "paplay": [],
+    "ffplay": ["-nodisp", "-autoexit", "-loglevel", "quiet"],
+    "aplay": ["-q"],
+}
+
+# players that can only play WAV files, other clips are converted to WAV once at startup
+WAV_ONLY_PLAYERS = {"paplay", "aplay"}
+
+
+def load_sound(path: Path):
+    """
+    Decode a sound file into a float32 array of shape (n_samples, n_channels).
+    WAV files are decoded with the standard library, other formats with soundfile.
+
+    Returns:
+        tuple: The samples and the sample rate.
+    """
+    path = Path(path)
+    if path.suffix.lower() == ".wav":
+        with wave.open(str(path), "rb") as file:
+            n_channels, sample_width, sample_rate = file.getnchannels(), file.getsampwidth(), file.getframerate()
+            frames = file.readframes(file.getnframes())
+
+        if sample_width == 1: # 8-bit WAV is unsigned
+            data = (np.frombuffer(frames, dtype=np.uint8).astype(np.float32) - 128) / 128
+        else:
+            dtype = {2: np.int16, 4: np.int32}[sample_width]
+            data = np.frombuffer(frames, dtype=dtype).astype(np.float32) / np.iinfo(dtype).max
+
+        return data.reshape(-1, n_channels), sample_rate
+
+    import soundfile
+    data, sample_rate = soundfile.read(str(path), dtype="float32", always_2d=True)
+    return data, sample_rate
+
+
+def write_wav(path: Path, data: np.ndarray, sample_rate: int):
+    """
+    Write samples of shape (n_samples, n_channels), as returned by load_sound, to a 16-bit WAV file.
+    """
+    with wave.open(str(path), "wb") as file:
+        file.setnchannels(data.shape[1])
+        file.setsampwidth(2)
+        file.setframerate(sample_rate)
+        file.writeframes((np.clip(data, -1, 1) * np.iinfo(np.int16).max).astype("<i2").tobytes())
+
+
+class AudioFeedback:
+    def __init__(self, backend: str = "auto", sound_dir: Path = SOUND_DIR):
+        """
+        Plays the feedback sounds of the Digitiser on a background worker thread, so playing never blocks
+        acquisition or the UI.
+
+        Only the latest sound is kept: a new sound cuts off the one still playing and replaces one still waiting to
+        be played, so the feedback never falls behind fast stylus presses.
+
+        Args:
+            backend (str): One of
+                - "sounddevice" (default, part of requirements.txt): the clips are decoded once at startup and played
+                  in-process, no process is started per sound.
+                - "command": fallback that starts a command line player (afplay, paplay, ffplay or aplay) for every
+                  sound. Clips a player can not read are converted to WAV once at startup.
+                - "silent": no sound, for example on headless machines.
+                - "auto": the first of the above that is available.
+            sound_dir (Path): Directory containing the sound files.
+        """
+        if backend not in ["auto", "sounddevice", "command", "silent"]:
+            raise ValueError(f"Invalid backend {backend}; must be 'auto', 'sounddevice', 'command' or 'silent'.")
+
+        self.sound_files = {sound_type: Path(sound_dir) / file for sound_type, file in SOUND_FILES.items()}
+        self.sounds = {}
+        self.player = None
+        self._process = None # the running command line player
+        self._wav_dir = None
+
+        if backend in ["auto", "sounddevice"]:
+            try:
+                self._setup_sounddevice()
+                backend = "sounddevice"
+            except Exception as e: # missing package, library or output device
+                if backend == "sounddevice":
+                    raise
+                print(f"In-process audio unavailable ({e}), falling back to a command line player for every sound.")
+
+        if backend in ["auto", "command"]:
+            self.player = next((player for player in PLAYERS if shutil.which(player)), None)
+            if self.player is not None:
+                self._setup_command()
+                backend = "command"
+            elif backend == "command":
+                raise RuntimeError(f"None of the players {list(PLAYERS)} were found.")
+            else:
+                print("No audio backend available, sound feedback is disabled.")
+                backend = "silent"
+
+        self.backend = backend
+
+        # holds at most the one sound waiting to be played
+        self._queue = queue.Queue(maxsize=1)
+        self._worker = None
+        if self.backend != "silent":
+            self._worker = threading.Thread(target=self._play_queued, daemon=True)
+            self._worker.start()
+
+    def _setup_sounddevice(self):
+        import sounddevice
+        sounddevice.query_devices(kind="output") # raises if there is no output device
+
+        self._sounddevice = sounddevice
+        for sound_type, path in self.sound_files.items():
+            try:
+                self.sounds[sound_type] = load_sound(path)
+            except ImportError:
+                print(f"Install soundfile to play {path.name}, it will be played silently.")
+
+    def _setup_command(self):
+        if self.player not in WAV_ONLY_PLAYERS:
+            return
+
+        for sound_type, path in self.sound_files.items():
+            if path.suffix.lower() == ".wav":
+                continue
+            try:
+                data, sample_rate = load_sound(path)
+            except ImportError:
+                print(f"Install soundfile to play {path.name} with {self.player}, it will be played silently.")
+                self.sound_files[sound_type] = None
+                continue
+
+            if self._wav_dir is None:
+                self._wav_dir = tempfile.TemporaryDirectory(prefix="opm_lab_sounds_")
+            wav_path = Path(self._wav_dir.name) / f"{path.stem}.wav"
+            write_wav(wav_path, data, sample_rate)
+            self.sound_files[sound_type] = wav_path
+
+    def play(self, sound_type: str):
+        """
+        Queue a sound ("beep", "wrong" or "done") and return immediately, replacing a sound still waiting to be played.
+        """
+        if sound_type not in self.sound_files:
+            raise ValueError(f"Unknown sound {sound_type}; must be one of {list(self.sound_files)}.")
+
+        if self._worker is None:
+            return
+
+        while True:
+            try:
+                self._queue.put_nowait(sound_type)
+                return
+            except queue.Full:
+                try:
+                    self._queue.get_nowait() # drop the stale sound
+                except queue.Empty:
+                    pass
+
+    def close(self):
+        """
+        Stop the worker thread after the last sound has been played.
+        """
+        if self._worker is not None:
+            self._queue.put(None)
+            self._worker.join()
+            self._worker = None
+
+        if self._wav_dir is not None:
+            self._wav_dir.cleanup()
+            self._wav_dir = None
+
+    def _play_queued(self):
+        while True:
+            sound_type = self._queue.get()
+            if sound_type is None:
+                self._wait()
+                return
+            try:
+                self._play(sound_type)
+            except Exception as e: # never let a failing sound stop the worker
+                print(f"Could not play {sound_type}: {e}")
+
+    def _play(self, sound_type: str):
+        """
+        Start playing a sound, cutting off the sound still playing.
+        """
+        if self.backend == "sounddevice":
+            if sound_type in self.sounds:
+                data, sample_rate = self.sounds[sound_type]
+                self._sounddevice.play(data, sample_rate) # stops the current sound
+        elif self.backend == "command" and self.sound_files[sound_type] is not None:
+            if self._process is not None and self._process.poll() is None:
+                self._process.terminate()
+                self._process.wait()
+            self._process = subprocess.Popen(
+                [self.player, *PLAYERS[self.player], str(self.sound_files[sound_type])],
+                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+            )
+
+    def _wait(self):
+        """
+        Wait for the sound still playing to finish.
+        """
+        try:
+            if self.backend == "sounddevice":
+                self._sounddevice.wait()
+            elif self._process is not None:
+                self._process.wait()
+        except Exception as e:
+            print(f"Could not wait for the last sound: {e}")
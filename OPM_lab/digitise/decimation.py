@@ -0,0 +1,113 @@
+import math
+import numpy as np
+import pandas as pd
+
+
+class SpatialHashFilter:
+    def __init__(self, min_spacing: float):
+        """
+        Rejects points closer than min_spacing to a previously accepted point.
+
+        Accepted points are hashed into cubic voxels with a side of min_spacing, so a new point only has to be
+        compared with the points in its own and the 26 neighbouring voxels, which keeps every check O(1).
+
+        Args:
+            min_spacing (float): The minimum distance between accepted points, in the unit of the points.
+
+        Attributes:
+            n_accepted (int): The number of points accepted.
+            n_rejected (int): The number of points rejected as near-duplicates.
+        """
+        if min_spacing <= 0:
+            raise ValueError(f"min_spacing must be positive, got {min_spacing}.")
+
+        self.min_spacing = min_spacing
+        self.n_accepted = 0
+        self.n_rejected = 0
+        self._voxels: dict[tuple, list] = {}
+        self._offsets = [(i, j, k) for i in (-1, 0, 1) for j in (-1, 0, 1) for k in (-1, 0, 1)]
+
+    def _voxel(self, position):
+        return tuple(math.floor(coordinate / self.min_spacing) for coordinate in position)
+
+    def is_near_duplicate(self, position):
+        """
+        Whether position lies within min_spacing of an accepted point.
+        """
+        x, y, z = (float(coordinate) for coordinate in position[:3])
+        i, j, k = self._voxel((x, y, z))
+        min_spacing_squared = self.min_spacing ** 2
+
+        for di, dj, dk in self._offsets:
+            for px, py, pz in self._voxels.get((i + di, j + dj, k + dk), ()):
+                if (px - x) ** 2 + (py - y) ** 2 + (pz - z) ** 2 < min_spacing_squared:
+                    return True
+        return False
+
+    def accept(self, position):
+        """
+        Accept position unless it is a near-duplicate.
+
+        Returns:
+            bool: Whether the point was accepted.
+        """
+        if self.is_near_duplicate(position):
+            self.n_rejected += 1
+            return False
+
+        point = tuple(float(coordinate) for coordinate in position[:3])
+        self._voxels.setdefault(self._voxel(point), []).append(point)
+        self.n_accepted += 1
+        return True
+
+    def report(self, name: str = "points"):
+        """
+        Print the reduction achieved.
+        """
+        n_total = self.n_accepted + self.n_rejected
+        if n_total:
+            print(
+                f"Kept {self.n_accepted} of {n_total} {name} ({100 * self.n_rejected / n_total:.1f}% rejected "
+                f"closer than {self.min_spacing} apart)"
+            )
+
+
+def decimate_points(xyz: np.ndarray, min_spacing: float, name: str = None):
+    """
+    Greedily keep points, in order, that are at least min_spacing from every point kept before them.
+
+    Args:
+        xyz (np.ndarray): Points of shape (n_points, 3).
+        min_spacing (float): The minimum distance between kept points, in the unit of xyz.
+        name (str): If given, the reduction achieved is printed with this name for the points.
+
+    Returns:
+        np.ndarray: Boolean mask of the points kept.
+    """
+    spatial_filter = SpatialHashFilter(min_spacing)
+    keep = np.array([spatial_filter.accept(point) for point in np.asarray(xyz, dtype=float)], dtype=bool).reshape(-1)
+    if name is not None:
+        spatial_filter.report(name)
+
+    return keep
+
+
+def decimate_digitisation(df: pd.DataFrame, min_spacing: float, label: str = "head"):
+    """
+    Decimate the points with a given label (by default the head shape) of a saved digitisation, leaving all other
+    points untouched, and print the reduction achieved.
+
+    Args:
+        df (pd.DataFrame): DataFrame with columns ["label", "x", "y", "z"].
+        min_spacing (float): The minimum distance between kept points, in the unit of the digitisation.
+        label (str): The label of the points to decimate.
+
+    Returns:
+        pd.DataFrame: The digitisation without the near-duplicate points.
+    """
+    is_label = (df["label"] == label).to_numpy()
+    keep = np.ones(len(df), dtype=bool)
+
+    keep[is_label] = decimate_points(df.loc[is_label, ["x", "y", "z"]].to_numpy(dtype=float), min_spacing, name=f"{label} points")
+
+    return df[keep]
@@ -0,0 +1,161 @@
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from ..utils import determine_conversion_factor
+
+FIDUCIAL_LABELS = ["nasion", "lpa", "rpa"]
+HDF5_KEY = "digitisation"
+
+
+def save_digitisation(df: pd.DataFrame, output_path: Path):
+    """
+    Save digitised points, with the format determined by the suffix of output_path:
+        - ".csv": plain text.
+        - ".npz": numpy arrays, with categories and labels stored as integer codes into lookup tables.
+        - ".parquet": typed columnar file (requires pyarrow or fastparquet).
+        - ".h5" or ".hdf5": HDF5 table (requires pytables).
+
+    Args:
+        df (pd.DataFrame): DataFrame with columns ["category", "label", "x", "y", "z"].
+        output_path (Path): The file to write.
+    """
+    output_path = Path(output_path)
+    suffix = output_path.suffix.lower()
+
+    if suffix == ".csv":
+        df.to_csv(output_path, index=False)
+    elif suffix == ".npz":
+        category = pd.Categorical(df["category"])
+        label = pd.Categorical(df["label"])
+        np.savez(
+            output_path,
+            category_codes=category.codes.astype(np.int32),
+            categories=np.array(category.categories, dtype=str),
+            label_codes=label.codes.astype(np.int32),
+            labels=np.array(label.categories, dtype=str),
+            xyz=df[["x", "y", "z"]].to_numpy(dtype=np.float64),
+        )
+    elif suffix == ".parquet":
+        _typed(df).to_parquet(output_path, index=False)
+    elif suffix in [".h5", ".hdf5"]:
+        _typed(df).to_hdf(output_path, key=HDF5_KEY, mode="w", format="table")
+    else:
+        raise ValueError(f"Invalid file format {suffix}; must be '.csv', '.npz', '.parquet', '.h5' or '.hdf5'.")
+
+
+def read_digitisation(path: Path):
+    """
+    Read digitised points saved with save_digitisation.
+
+    Returns:
+        pd.DataFrame: DataFrame with categorical columns "category" and "label" and float columns "x", "y" and "z".
+    """
+    path = Path(path)
+    suffix = path.suffix.lower()
+
+    if suffix == ".csv":
+        df = pd.read_csv(path)
+    elif suffix == ".npz":
+        with np.load(path, allow_pickle=False) as data:
+            xyz = data["xyz"]
+            return pd.DataFrame({
+                "category": pd.Categorical.from_codes(data["category_codes"], categories=list(data["categories"])),
+                "label": pd.Categorical.from_codes(data["label_codes"], categories=list(data["labels"])),
+                "x": xyz[:, 0],
+                "y": xyz[:, 1],
+                "z": xyz[:, 2],
+            })
+    elif suffix == ".parquet":
+        df = pd.read_parquet(path)
+    elif suffix in [".h5", ".hdf5"]:
+        df = pd.read_hdf(path, key=HDF5_KEY)
+    else:
+        raise ValueError(f"Invalid file format {suffix}; must be '.csv', '.npz', '.parquet', '.h5' or '.hdf5'.")
+
+    return _typed(df)
+
+
+def _typed(df: pd.DataFrame):
+    """
+    Categorical category and label columns and float64 coordinates.
+    """
+    df = df.copy()
+    for column in ["category", "label"]:
+        df[column] = df[column].astype(str).astype("category")
+    df[["x", "y", "z"]] = df[["x", "y", "z"]].astype(np.float64)
+    return df
+
+
+class DigitisedPoints:
+    def __init__(
+        self,
+        fiducials: dict[str, np.ndarray],
+        hsp: np.ndarray,
+        eeg_labels: list[str],
+        eeg_pos: np.ndarray,
+        opm_labels: list[str],
+        opm_pos: np.ndarray
+    ):
+        """
+        Digitised points split by type, in metres, as used by the MNE integration functions.
+
+        Args:
+            fiducials (dict[str, np.ndarray]): Positions of "nasion", "lpa" and "rpa" (None if not digitised).
+            hsp (np.ndarray): Head-shape points, shape (n_points, 3).
+            eeg_labels (list[str]): The labels of the EEG electrodes.
+            eeg_pos (np.ndarray): Positions of the EEG electrodes, shape (n_electrodes, 3).
+            opm_labels (list[str]): The labels of the OPM sensors.
+            opm_pos (np.ndarray): Positions of the OPM sensors, shape (n_sensors, 3).
+        """
+        self.fiducials = fiducials
+        self.hsp = hsp
+        self.eeg_labels = eeg_labels
+        self.eeg_pos = eeg_pos
+        self.opm_labels = opm_labels
+        self.opm_pos = opm_pos
+
+    @classmethod
+    def from_dataframe(cls, df: pd.DataFrame, unit: str = "m"):
+        """
+        Split a digitisation DataFrame in one pass.
+
+        Args:
+            df (pd.DataFrame): DataFrame with columns ["category", "label", "x", "y", "z"]. The OPM sensors are taken
+                from the "sensor_type" column if present, otherwise from the "category" column.
+            unit (str): Unit of the digitised points, can be "m", "cm" or "mm".
+        """
+        xyz = df[["x", "y", "z"]].to_numpy(dtype=np.float64) / determine_conversion_factor(unit, "m")
+        labels = df["label"].to_numpy(dtype=str)
+        categories = df["category"].to_numpy(dtype=str)
+        sensor_types = df["sensor_type"].to_numpy(dtype=str) if "sensor_type" in df.columns else categories
+
+        fiducials = {}
+        for label in FIDUCIAL_LABELS:
+            idx = np.flatnonzero(labels == label)
+            fiducials[label] = xyz[idx[-1]] if len(idx) else None # the last digitisation counts
+
+        is_eeg = categories == "EEG"
+        is_opm = sensor_types == "OPM"
+
+        return cls(
+            fiducials=fiducials,
+            hsp=xyz[labels == "head"],
+            eeg_labels=labels[is_eeg].tolist(),
+            eeg_pos=xyz[is_eeg],
+            opm_labels=labels[is_opm].tolist(),
+            opm_pos=xyz[is_opm],
+        )
+
+
+def load_digitisation(path: Path, unit: str = "cm"):
+    """
+    Load a digitisation saved with save_digitisation, split by type and converted to metres.
+
+    Args:
+        path (Path): The digitisation file (.csv, .npz, .parquet, .h5 or .hdf5).
+        unit (str): Unit of the saved points, cm for digitisations from the FASTRAK.
+
+    Returns:
+        DigitisedPoints: The digitised points.
+    """
+    return DigitisedPoints.from_dataframe(read_digitisation(path), unit=unit)
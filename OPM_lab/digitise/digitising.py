@@ -1,26 +1,41 @@
 import pandas as pd
-import matplotlib.pyplot as plt
-from matplotlib.animation import FuncAnimation
-from matplotlib import gridspec
+import numpy as np
 from pathlib import Path
-import os
 from .fastrak_connector import FastrakConnector
+from .point_store import PointStore
+from .audio import AudioFeedback
+from .decimation import SpatialHashFilter
+from .journal import DigitisationJournal
+from .digitisation_io import save_digitisation
+from .instrumentation import NULL_TIMER
 from ..sensor_position import HelmetTemplate
 import math
 
-BASE_DIR = Path(__file__).resolve().parents[1]
-SOUND_DIR = BASE_DIR / "soundfiles"
+CATEGORY_COLOURS = {'OPM': 'blue', 'head': 'grey', "fiducials": "red", "EEG": "purple"}
+CATEGORY_ALPHA = {'head': 0.5, 'OPM': 1.0, 'fiducials': 1.0, 'EEG': 1.0}
+
+# points digitised further than this from the head reference (cm) are rejected
+MAX_STYLUS_DISTANCE = 30.
 
 
 class Digitiser:
+    # With several styluses, the distance (cm) a stylus has to move since its last kept position in a continuous step
+    # for its position to be kept, so a stylus lying idle does not record points
+    idle_distance = 0.5
+
     def __init__(
         self, 
         connector: FastrakConnector,
         digitisation_scheme: list[dict] = [],
-        y_lim:bool = False
+        y_lim:bool = False,
+        read_timeout:float = 0.1,
+        blit:bool = False,
+        audio:AudioFeedback = None,
+        journal_path:Path = None,
+        timer = None
     ):
         self.connector = connector
-        self.digitised_points = pd.DataFrame(columns=["category", "label", "x", "y", "z"])
+        self.points = PointStore()
         self.digitisation_scheme = digitisation_scheme
         self.current_category = None
         self.labels:list[int] = []  # To track labels for single digitisation
@@ -28,23 +43,95 @@ class Digitiser:
         self.n_points = 0
         self.fig, self.ax_dig, self.ani = None, None, None  # Plot elements
         self.ylim = y_lim
+        self.read_timeout = read_timeout # seconds each animation frame waits for the stylus before redrawing
+        self.blit = blit # only redraw the animated artists, best used with y_lim as the axes are not redrawn
+        self.audio = audio if audio is not None else AudioFeedback()
+        self.spatial_filter = None # rejects near-duplicate points in continuous steps with a min_spacing
+        # records the duration of every stage of the animation frames, shares the timer of the connector by default
+        self.timer = timer if timer is not None else getattr(connector, "timer", NULL_TIMER)
+        self.current_step = {}
+        self.current_dig_type = None
+        self.last_kept = {} # timestamp and position of the last frame kept from each stylus in a continuous step
+        self.stream_cursor = 0 # number of streamed frames consumed in a continuous step
+
+        # every accepted point and undo is journaled as it happens; an existing journal is replayed to resume
+        self.journal = None
+        if journal_path is not None:
+            if Path(journal_path).exists():
+                DigitisationJournal.replay(journal_path, self.points)
+                print(f"Resuming from {journal_path} with {len(self.points)} points")
+            self.journal = DigitisationJournal(journal_path)
+
+    def add(
+        self,
+        category: str,
+        labels: list[str] = [],
+        dig_type: str = "single",
+        n_points: int = None,
+        template:HelmetTemplate=None,
+        min_spacing:float = None,
+        min_distance:float = None,
+        min_interval:float = None,
+        continuous_output:bool = False
+    ):
+        """
+        Add a step to the digitisation scheme.
 
-    def add(self, category: str, labels: list[str] = [], dig_type: str = "single", n_points: int = None, template:HelmetTemplate=None):
+        Args:
+            category (str): The category of the points (e.g., 'OPM', 'head').
+            labels (list[str]): The labels of the points, defaults to the category for every point.
+            dig_type (str): Either "single" (one point per stylus press) or "continuous".
+            n_points (int): The number of points to digitise, required for 'continuous' digitisation.
+            template (HelmetTemplate): Helmet template to show the position of the current sensor on.
+            min_spacing (float): For 'continuous' digitisation, points closer than min_spacing (in the unit of the
+                connector, cm by default) to an earlier point of the step are rejected and do not count towards n_points.
+            min_distance (float): For 'continuous' digitisation, keep a frame once the stylus moved min_distance since
+                the last kept frame.
+            min_interval (float): For 'continuous' digitisation, keep a frame once min_interval seconds passed since
+                the last kept frame. Without min_distance and min_interval, every frame from the device is kept.
+            continuous_output (bool): For 'continuous' digitisation, put the device in continuous output mode instead
+                of only recording the frames output while the stylus is pressed.
+
+        In 'continuous' digitisation, positions more than 30 cm from the head reference are rejected. With several
+        styluses (see the styluses of FastrakConnector), every frame holds the positions of all styluses, also of a
+        stylus lying idle while the other one is pressed. The device does not tell which stylus was pressed, so a
+        stylus only records a point once it moved idle_distance (0.5 cm) since its last point, and its first position
+        in a step only serves as the starting point. A stylus that is moved without being used, e.g. picked up,
+        still records points.
+        """
         if dig_type not in ["single", "continuous"]:
             raise ValueError("Invalid dig_type; must be either 'single' or 'continuous'.")
 
         if dig_type == "continuous" and n_points is None:
             raise ValueError("For 'continuous' digitisation, specify n_points.")
 
+        if dig_type != "continuous" and (
+            min_spacing is not None or min_distance is not None or min_interval is not None or continuous_output
+        ):
+            raise ValueError(
+                "min_spacing, min_distance, min_interval and continuous_output can only be used for 'continuous' digitisation."
+            )
+
+        if self.journal is not None: # fail now rather than on the first point of the step
+            self.journal.check_text(category, *labels)
+
         self.digitisation_scheme.append({
             "category": category,
             "labels": labels,
             "dig_type": dig_type,
             "n_points": n_points,
-            "template": template
+            "template": template,
+            "min_spacing": min_spacing,
+            "min_distance": min_distance,
+            "min_interval": min_interval,
+            "continuous_output": continuous_output
         })
 
     def setup_plot(self):
+        # matplotlib is only imported when plotting, so headless use never pays for it
+        import matplotlib.pyplot as plt
+        from matplotlib import gridspec
+
         # Initialize plot with the figure and axis
         self.fig = plt.figure(figsize=(15, 6))
         gs = gridspec.GridSpec(1, 3, width_ratios=[1, 1, 1], wspace=0.2)
@@ -64,30 +151,70 @@ class Digitiser:
         self.ax_dig.set_zlabel("Z")
         self.ax_dig.set_title("Digitised points")
 
+        # persistent artists for the digitised points, updated in place by update_plot
+        self.dig_scatter = self.ax_dig.scatter([], [], [])
+        self.dig_texts = [] # one text artist per point, None for head points
+        self.n_plotted = 0
+
+        # the helmet template is drawn once per step as a single collection, only the current sensor is updated
+        self.helmet_focus = None
+        if self.current_template:
+            self.ax_helmet.scatter(*self.current_template.get_chs_pos().T, c="blue", label="all sensors", alpha=0.6, s=8)
+            self.helmet_focus = self.ax_helmet.scatter([], [], [], c="red", label="current sensor", alpha=1, s=20)
+        self.reset_plot_axes()
+
+        self.instruction_text = self.ax_text.text(0.1, 0.8, "", fontsize=30, color="black")
+        self.point_text = self.ax_text.text(0.1, 0.6, "", fontsize=20, color="black")
+        self.displayed_label_idx = None
+
+    def animated_artists(self):
+        """
+        The artists updated by the animation.
+        """
+        artists = [self.dig_scatter, self.instruction_text, self.point_text]
+        artists.extend(text for text in self.dig_texts if text is not None)
+        if self.helmet_focus is not None:
+            artists.append(self.helmet_focus)
+        return artists
 
     def start_animation(self):
+        import matplotlib.pyplot as plt
+        from matplotlib.animation import FuncAnimation
+
         # Start animation with FuncAnimation
-        self.ani = FuncAnimation(self.fig, self.animate, interval=200, cache_frame_data=False)
+        self.ani = FuncAnimation(self.fig, self.animate, interval=200, cache_frame_data=False, blit=self.blit)
         plt.show()
     
     def animate(self, i):
-        # Initial setup for the first frame
-        if i == 0:
-            self.current_label = self.labels[self.current_label_idx]
-        # Handle continuous or single mode logic
-        elif self.current_dig_type == "single":
-            self.handle_single_digitisation(i)
-        elif self.current_dig_type == "continuous":
-            self.handle_continuous_digitisation(i)
-
-        # Plot the digitised points
-        self.update_plot()
-
-        # Update the helmet view and instructions
-        self.update_helmet_and_instructions()
-
-        # Reset axis labels and limits for the 3D plots
-        self.reset_plot_axes()
+        with self.timer.stage("animate"):
+            # Initial setup for the first frame
+            if i == 0:
+                self.current_label = self.labels[self.current_label_idx]
+            # Handle continuous or single mode logic
+            elif self.current_dig_type == "single":
+                with self.timer.stage("acquire"):
+                    self.handle_single_digitisation(i)
+            elif self.current_dig_type == "continuous":
+                with self.timer.stage("acquire"):
+                    self.handle_continuous_digitisation(i)
+
+            # Plot the digitised points
+            with self.timer.stage("update_plot"):
+                self.update_plot()
+
+            # Update the helmet view and instructions
+            with self.timer.stage("helmet_panel"):
+                self.update_helmet_and_instructions()
+
+            # points accepted this frame are forced to disk before the next one
+            if self.journal is not None:
+                with self.timer.stage("journal_sync"):
+                    self.journal.sync()
+
+        # when blitting, all animated artists are redrawn on top of the cached background: FuncAnimation restores the
+        # background of every axes with a returned artist (erasing the animated artists not returned) and redraws the
+        # whole figure when nothing is returned, so returning only the changed artists is not an option
+        return self.animated_artists()
 
     def handle_single_digitisation(self, i):
         """
@@ -95,11 +222,14 @@ class Digitiser:
         - Check if the point is valid (within the range from the head receiver).
         - Update the label index and play sound accordingly.
         """
-        data, position = self.connector.get_position_relative_to_head_receiver()
+        try:
+            data, position = self.connector.get_position_relative_to_head_receiver(timeout=self.read_timeout)
+        except TimeoutError: # stylus not pressed yet
+            return
 
         # Check if the point is too far from the head (more than 30 cm)
-        point1 = (data[1, 0], data[2, 0], data[3, 0])
-        point2 = (data[1, 1], data[2, 1], data[3, 1])
+        point1 = tuple(data[1:4, self.connector.stylus_receiver])
+        point2 = tuple(data[1:4, self.connector.head_reference])
 
         # Calculate distance and determine whether to move to next point or undo
         distance = self.calculate_distance(point1, point2)
@@ -107,153 +237,305 @@ class Digitiser:
 
         if not cont:
             self.play_sound("wrong")
-            self.current_label_idx = idx
+            # Undo the last point of this step, if any
             if self.current_label_idx != 0:
                 self.current_label_idx = idx
-            # Undo the last point
-            self.digitised_points = self.digitised_points.head(-1)
-            print(self.digitised_points.tail(3))
+                self.current_label = self.labels[self.current_label_idx]
+                self.remove_last_point()
+            print(self.points.to_dataframe(start=-3))
         else:
             self.play_sound("beep")
             self.update_digitised_data(self.current_category, self.current_label, position)
             self.current_label_idx += 1
             try:
                 self.current_label = self.labels[self.current_label_idx]
-            except IndexError: # when no more labes are present close the plot
-                plt.close()
+            except IndexError: # when no more labes are present the step is done
+                self.on_step_complete()
         
     def handle_continuous_digitisation(self, i):
         """
         Handle logic for continuous digitisation mode:
-        - Continuously capture data and update the points.
-        - Progress the label index after each valid capture.
+        - Take all frames the connector streamed in the background since the last animation frame.
+        - Keep the position of each stylus if it moved min_distance or min_interval seconds passed since the last
+          position kept from that stylus, and it is not a near-duplicate of an earlier point (min_spacing).
+        - Progress the label index after each kept position.
         """
-        data, position = self.connector.get_position_relative_to_head_receiver()
+        if not self.connector.streaming:
+            # the reader thread stopped on an error, end the step; finish_step() raises the error
+            self.on_step_complete()
+            return
+
+        timestamps, _, positions, self.stream_cursor, n_overwritten = self.connector.stream.frames_since(self.stream_cursor)
+        if n_overwritten:
+            self.timer.dropped(n_overwritten)
+            print(f"Warning: {n_overwritten} frames were overwritten before they were read")
+
+        # one position per stylus and frame, with several styluses the operators digitise at the same time
+        positions = positions.reshape(len(timestamps), -1, 3)
+
+        for timestamp, frame_positions in zip(timestamps, positions):
+            for stylus, position in enumerate(frame_positions):
+                if not self.keep_frame(timestamp, position, stylus):
+                    continue
+
+                self.update_digitised_data(self.current_category, self.current_label, position)
+                self.current_label_idx += 1
+
+                try:
+                    self.current_label = self.labels[self.current_label_idx]
+                except IndexError: # when no more labes are present the step is done
+                    self.on_step_complete()
+                    return
+
+    def keep_frame(self, timestamp: float, position: np.ndarray, stylus: int = 0):
+        """
+        Decide whether to keep the position of a stylus from a streamed frame in continuous digitisation mode.
+        Positions too far from the head reference are rejected; otherwise, without min_distance and min_interval,
+        every frame is kept. With several styluses, a stylus also has to have moved, see add().
+        """
+        if np.sum(position ** 2) > MAX_STYLUS_DISTANCE ** 2: # relative to the head reference
+            return False
 
-        self.update_digitised_data(self.current_category, self.current_label, position)
-        self.current_label_idx += 1
+        min_distance, min_interval = self.current_step.get("min_distance"), self.current_step.get("min_interval")
 
-        try:
-            self.current_label = self.labels[self.current_label_idx]
-        except IndexError: # when no more labes are present close the plot
-            plt.close()
+        last_kept = self.last_kept.get(stylus)
+        if len(self.connector.styluses) > 1:
+            if last_kept is None: # where the stylus was when the step started
+                self.last_kept[stylus] = (timestamp, position.copy())
+                return False
+            if np.sum((position - last_kept[1]) ** 2) < self.idle_distance ** 2:
+                return False
+
+        if last_kept is not None and (min_distance is not None or min_interval is not None):
+            last_timestamp, last_position = last_kept
+            moved = min_distance is not None and np.sum((position - last_position) ** 2) >= min_distance ** 2
+            elapsed = min_interval is not None and timestamp - last_timestamp >= min_interval
+            if not (moved or elapsed):
+                return False
+
+        if self.spatial_filter is not None and not self.spatial_filter.accept(position):
+            return False # too close to an earlier point
+
+        self.last_kept[stylus] = (timestamp, position.copy())
+        return True
+
+    def on_step_complete(self):
+        """
+        Called when the last point of the current step has been digitised. Closes the figure, which ends
+        the animation and moves run_digitisation on to the next step.
+        """
+        import matplotlib.pyplot as plt
+        plt.close(self.fig)
 
     def update_plot(self):
         """
         Update the 3D plot with the digitised points.
-        This method will clear the previous plot and re-render the points.
-        """
-        self.ax_dig.cla()  # Clear previous frame
-        colors = {'OPM': 'blue', 'head': 'grey', "fiducials": "red", "EEG": "purple"}
-        alpha = {'head': 0.5, 'OPM': 1.0, 'fiducials': 1.0, 'EEG': 1.0}  # Define alpha values for each category
-
-        if not self.digitised_points.empty:
-            self.ax_dig.scatter(
-                self.digitised_points['x'],
-                self.digitised_points['y'],
-                self.digitised_points['z'],
-                c=self.digitised_points['category'].map(colors),
-                alpha=self.digitised_points['category'].map(alpha)
-            )
-            for _, row in self.digitised_points.iterrows():
-                if row['category'] != "head":  # Exclude head points
-                    self.ax_dig.text(row['x'], row['y'], row['z'], row['label'])
+        The scatter is updated in place and text artists are only added for new points (and removed for undone
+        points), so the cost of updating the plot does not grow with the number of points.
+        """
+        n_points = len(self.points)
+        if n_points == self.n_plotted:
+            return
+
+        # remove the labels of undone points
+        while len(self.dig_texts) > n_points:
+            text = self.dig_texts.pop()
+            if text is not None:
+                text.remove()
+
+        xyz = self.points.xyz
+        category_codes = self.points.category_codes
+
+        # add labels for new points, excluding head points
+        for idx in range(len(self.dig_texts), n_points):
+            category = self.points.categories[category_codes[idx]]
+            text = None
+            if category != "head":
+                text = self.ax_dig.text(*xyz[idx], self.points.labels[self.points.label_codes[idx]])
+            self.dig_texts.append(text)
+
+        from matplotlib.colors import to_rgba_array
+
+        colours = to_rgba_array([CATEGORY_COLOURS.get(category, "black") for category in self.points.categories])
+        colours[:, 3] = [CATEGORY_ALPHA.get(category, 1.0) for category in self.points.categories]
+        colours = colours[category_codes]
+
+        self.dig_scatter._offsets3d = (xyz[:, 0], xyz[:, 1], xyz[:, 2])
+        self.dig_scatter.set_facecolor(colours)
+        self.dig_scatter.set_edgecolor(colours)
+
+        if not self.ylim:
+            self.ax_dig.auto_scale_xyz(xyz[:, 0], xyz[:, 1], xyz[:, 2], had_data=False)
+
+        self.n_plotted = n_points
 
     def update_helmet_and_instructions(self):
         """
         Update the helmet view and the instructions shown to the user.
         This includes displaying the current label and the point being digitised.
+        Only the current sensor marker and the text are updated, and only when the label index changes.
         """
-        # Update helmet view
-        self.ax_helmet.cla()  # Clear previous frame
-        if self.current_template:
-            for pos in self.current_template.get_chs_pos():
-                self.ax_helmet.scatter(*pos, c="blue", label="all sensors", alpha=0.6, s=8)
+        if self.current_label_idx == self.displayed_label_idx:
+            return
 
-            focus = self.current_template.get_chs_pos([self.current_label])[0]
-            self.ax_helmet.scatter(*focus, c="red", label="current sensor", alpha=1, s=20)
+        # Update helmet view
+        if self.helmet_focus is not None:
+            focus = self.current_template.get_chs_pos([self.current_label]).reshape(-1, 3)
+            self.helmet_focus._offsets3d = tuple(focus.T)
 
         # Update instructions text
-        self.ax_text.clear()  # Clear any previous instructions
-        self.ax_text.axis('off')  # Hide axes for text display
-
         try:
             current_instruction = f"{self.current_category}\n{self.labels[self.current_label_idx]}"
         except IndexError:
             current_instruction = f"Done digitising {self.current_category}"
-        
-        self.ax_text.text(0.1, 0.8, current_instruction, fontsize=30, color="black")
 
-        point_instruction = f"Point {self.current_label_idx + 1} of {self.n_points}"
-        self.ax_text.text(0.1, 0.6, point_instruction, fontsize=20, color="black")
+        self.instruction_text.set_text(current_instruction)
+        self.point_text.set_text(f"Point {self.current_label_idx + 1} of {self.n_points}")
+
+        self.displayed_label_idx = self.current_label_idx
 
     def reset_plot_axes(self):
         """
-        Reset the plot axes to default settings.
+        Reset the helmet plot axes to default settings.
         """
-        for ax in [self.ax_dig, self.ax_helmet]:
-            ax.set_xlabel("X")
-            ax.set_ylabel("Y")
-            ax.set_zlabel("Z")
-        if self.ylim:
-            self.ax_dig.set_xlim([-30, 30])
-            self.ax_dig.set_ylim([-30, 30])
-            self.ax_dig.set_zlim([-30, 30])
-        self.ax_dig.set_title("Digitised points")
+        self.ax_helmet.set_xlabel("X")
+        self.ax_helmet.set_ylabel("Y")
+        self.ax_helmet.set_zlabel("Z")
+
+    @property
+    def digitised_points(self) -> pd.DataFrame:
+        """
+        The digitised points as a dataframe with columns ["category", "label", "x", "y", "z"].
+        """
+        return self.points.to_dataframe()
 
     def update_digitised_data(self, category: str, label: str, position: tuple[float, float, float]):
         """
-        Update the dataframe with a new position for a digitised point.
+        Add a new position for a digitised point.
         
         Args:
             category (str): The category of the point (e.g., 'OPM', 'head').
             label (str): The label associated with this point.
             position (tuple): The (x, y, z) coordinates of the point.
         """
-        # Update the dataframe with new position data
-        new_data = pd.DataFrame({
-            "category": [category],
-            "label": [label],
-            "x": [position[0]],
-            "y": [position[1]],
-            "z": [position[2]],
-        })
-       
-         
-        self.digitised_points = pd.concat(
-            [self.digitised_points if not self.digitised_points.empty else None, 
-             new_data], 
-            
-            ignore_index=True)
+        # journaled first, so a point that can not be journaled is not kept in memory either
+        if self.journal is not None:
+            self.journal.append(category, label, position)
+        self.points.append(category, label, position)
 
-    def run_digitisation(self):
+    def remove_last_point(self):
+        """
+        Undo the last digitised point.
+        """
+        if self.points.pop() is not None and self.journal is not None:
+            self.journal.undo()
+
+    def completed_steps(self):
+        """
+        Split the points already digitised (e.g. replayed from a journal) over the steps of the digitisation scheme,
+        in order.
+
+        Returns:
+            list[tuple]: For each step, the index of its first point and the number of its points already digitised.
+        """
+        completed, start, n_remaining = [], 0, len(self.points)
         for dig in self.digitisation_scheme:
-            # Set up for digitising points
-            self.current_category = dig["category"]
-            self.n_points = dig["n_points"] if dig["n_points"] else len(dig["labels"])
-            self.labels = dig["labels"] if dig["labels"] else [self.current_category] * self.n_points
-            self.current_label_idx = 0
-            self.current_template = dig["template"]
-            self.current_dig_type = dig["dig_type"]
-            
-            
-            self.connector.clear_old_data()
+            n_completed = min(dig["n_points"] if dig["n_points"] else len(dig["labels"]), n_remaining)
+            completed.append((start, n_completed))
+            start += n_completed
+            n_remaining -= n_completed
+
+        if n_remaining:
+            raise ValueError(f"{len(self.points)} points were digitised, more than the digitisation scheme contains.")
 
+        categories = np.array(self.points.categories, dtype=object)[self.points.category_codes]
+        for dig, (start, n_completed) in zip(self.digitisation_scheme, completed):
+            if np.any(categories[start:start + n_completed] != dig["category"]):
+                raise ValueError(f"The digitised points do not match the {dig['category']} step of the digitisation scheme.")
+
+        return completed
+
+    def setup_step(self, dig: dict, start: int = 0, n_completed: int = 0):
+        """
+        Prepare for digitising the points of a step of the digitisation scheme. For continuous steps, the connector
+        starts streaming frames in the background at the native rate of the device.
+
+        Args:
+            dig (dict): The step, see add().
+            start (int): Index of the first point of the step, if points of the step were already digitised.
+            n_completed (int): The number of points of the step already digitised; digitisation resumes after them.
+        """
+        self.current_step = dig
+        self.current_category = dig["category"]
+        self.n_points = dig["n_points"] if dig["n_points"] else len(dig["labels"])
+        self.labels = dig["labels"] if dig["labels"] else [self.current_category] * self.n_points
+        self.current_label_idx = n_completed
+        self.current_label = self.labels[n_completed] if n_completed < self.n_points else None
+        self.current_template = dig["template"]
+        self.current_dig_type = dig["dig_type"]
+        min_spacing = dig.get("min_spacing")
+        self.spatial_filter = SpatialHashFilter(min_spacing) if min_spacing else None
+        self.last_kept = {}
+
+        if self.spatial_filter is not None:
+            for position in self.points.xyz[start:start + n_completed]:
+                self.spatial_filter.accept(position)
+
+        self.connector.clear_old_data()
+
+        if self.current_dig_type == "continuous":
+            self.connector.start_streaming(continuous_output=dig.get("continuous_output", False))
+            self.stream_cursor = 0
+
+    def finish_step(self):
+        """
+        Clean up after a step of the digitisation scheme, stopping the background streaming of continuous steps.
+        """
+        if self.current_dig_type == "continuous":
+            self.connector.stop_streaming()
+
+        if self.spatial_filter is not None:
+            self.spatial_filter.report(f"{self.current_category} points")
+
+        if self.journal is not None:
+            self.journal.sync()
+
+    def run_digitisation(self):
+        for dig, (start, n_completed) in zip(self.digitisation_scheme, self.completed_steps()):
+            n_points = dig["n_points"] if dig["n_points"] else len(dig["labels"])
+            if n_completed == n_points: # already digitised before resuming
+                continue
+
+            self.setup_step(dig, start, n_completed)
             self.setup_plot()
-            self.start_animation()
+            try:
+                self.start_animation()
+            finally:
+                self.finish_step()
+
+    def close_journal(self):
+        """
+        Sync and close the journal, e.g. once the digitisation has been saved.
+        """
+        if self.journal is not None:
+            self.journal.close()
+            self.journal = None
 
     def save_digitisation(self, output_path: Path):
-        # Save the digitised points to a CSV file
-        self.digitised_points.to_csv(output_path, index=False)
+        # Save the digitised points, as CSV, .npz, Parquet or HDF5 depending on the suffix of output_path
+        save_digitisation(self.digitised_points, output_path)
 
-    @staticmethod
-    def play_sound(sound_type):
-        if sound_type == "beep":
-            os.system(f'afplay "{SOUND_DIR / "beep.wav"}"')
-        elif sound_type == "wrong":
-            os.system(f'afplay "{SOUND_DIR / "wrongbeep.wav"}"')
-        elif sound_type == "done":
-            os.system(f'afplay "{SOUND_DIR / "done.mp3"}"')
+        # with instrumentation enabled, the timings are saved next to the points
+        if self.timer.enabled:
+            output_path = Path(output_path)
+            self.timer.save(output_path.with_name(f"{output_path.stem}_timings.npz"))
+
+    def play_sound(self, sound_type):
+        """
+        Play a feedback sound ("beep", "wrong" or "done") without blocking.
+        """
+        with self.timer.stage("play_sound"):
+            self.audio.play(sound_type)
 
     @staticmethod
     def calculate_distance(point1:tuple, point2:tuple):
@@ -263,7 +545,7 @@ class Digitiser:
 
         return math.sqrt((x2 - x1) ** 2 + (y2 - y1) ** 2 + (z2 - z1) ** 2)
     
-    def idx_of_next_point(self, distance:float, idx:int, limit:float=30.):
+    def idx_of_next_point(self, distance:float, idx:int, limit:float=MAX_STYLUS_DISTANCE):
         # if stylus was clicked more than limit away from the head reference, the last point is undone
         if distance > limit:
             if idx <= 0:
@@ -0,0 +1,221 @@
+import os
+import select
+import struct
+import threading
+import time
+import tty
+import numpy as np
+
+
+def default_trajectory(t: float):
+    """
+    Head reference at rest, stylus circling the head reference with a radius of 10 cm. With more receivers, a second
+    stylus circles in the opposite direction with a radius of 8 cm and a second reference rests next to the first.
+
+    Returns:
+        np.ndarray: Array of shape (4, 6) with x, y, z (cm), azimuth, elevation and roll (degrees) for each receiver.
+    """
+    angle = 2 * np.pi * 0.2 * t
+    return np.array([
+        [20 + 10 * np.cos(angle), 10 * np.sin(angle), 10, 0, 0, 0], # stylus
+        [20, 0, 10, 0, 0, 0], # head reference
+        [20 + 8 * np.cos(-angle), 8 * np.sin(-angle), 12, 0, 0, 0], # second stylus
+        [25, 0, 10, 0, 0, 0], # second reference
+    ])
+
+
+class FastrakEmulator:
+    def __init__(self, n_receivers: int = 2, rate: float = 120., trajectory=None, press_interval: float = None):
+        """
+        Emulates a Polhemus FASTRAK on a pseudo-terminal, so FastrakConnector and Digitiser can be run and
+        benchmarked without hardware. Only available on POSIX systems.
+
+        The emulator answers the commands used by FastrakConnector: 'W' (factory defaults), 'u'/'U' (metric/inches),
+        'P' (single record from each receiver), 'C'/'c' (continuous output on/off) and 'F'/'f' (ASCII/binary records).
+
+        Args:
+            n_receivers (int): The number of active receivers.
+            rate (float): Frames per second in continuous output mode.
+            trajectory (callable or np.ndarray): Either a function of the time in seconds since start() returning an
+                array of shape (n_receivers, 6) with x, y, z (cm), azimuth, elevation and roll (degrees), or an array
+                of shape (n_frames, n_receivers, 6) that is played back (looping) at the given rate. Defaults to
+                default_trajectory, which describes up to four receivers.
+            press_interval (float): Seconds between scripted stylus presses, each outputting one frame when the
+                device is not in continuous mode. The presses start with begin_script(), so they do not interfere with
+                prepare_for_digitisation(). None disables scripted presses.
+
+        Attributes:
+            port (str): Name of the pseudo-terminal to pass to FastrakConnector as usb_port.
+            frames_sent (int): The number of frames written.
+            frames_dropped (int): The number of frames dropped because the client did not read fast enough.
+        """
+        if n_receivers < 1 or n_receivers > 4:
+            raise ValueError("The FASTRAK supports between 1 and 4 receivers.")
+
+        self.n_receivers = n_receivers
+        self.rate = rate
+        self.trajectory = default_trajectory if trajectory is None else trajectory
+        self.press_interval = press_interval
+
+        self.port = None
+        self.frames_sent = 0
+        self.frames_dropped = 0
+
+        self._master, self._slave = None, None
+        self._stop_event = threading.Event()
+        self._press_event = threading.Event()
+        self._script_event = threading.Event()
+        self._thread = None
+        self.reset()
+
+    def reset(self):
+        """
+        Restore the factory software defaults ('W' command).
+        """
+        self.metric = False
+        self.binary = False
+        self.continuous = False
+
+    def start(self):
+        """
+        Opens the pseudo-terminal and starts answering commands on a background thread.
+        """
+        if self._thread is not None:
+            raise RuntimeError("The emulator is already running.")
+
+        self._master, self._slave = os.openpty()
+        tty.setraw(self._slave) # no echo or newline translation, like a serial line
+        os.set_blocking(self._master, False)
+        self.port = os.ttyname(self._slave)
+
+        self._start_time = time.perf_counter()
+        self._stop_event.clear()
+        self._script_event.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+        return self
+
+    def stop(self):
+        if self._thread is None:
+            return
+
+        self._stop_event.set()
+        self._thread.join()
+        self._thread = None
+
+        os.close(self._master)
+        os.close(self._slave)
+        self._master, self._slave = None, None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def press(self):
+        """
+        Emulate a press of the stylus button, outputting one frame.
+        """
+        self._press_event.set()
+
+    def begin_script(self):
+        """
+        Start the scripted stylus presses (see press_interval), e.g. once the connector has been prepared.
+        """
+        self._script_event.set()
+
+    def pose(self, t: float):
+        """
+        The pose of every receiver t seconds after start().
+        """
+        if callable(self.trajectory):
+            return np.asarray(self.trajectory(t), dtype=float)
+
+        return self.trajectory[int(t * self.rate) % len(self.trajectory)]
+
+    def format_frame(self, pose: np.ndarray):
+        """
+        Format one record per receiver in the current output format and units.
+        """
+        pose = pose.copy()
+        if not self.metric:
+            pose[:, :3] /= 2.54
+
+        records = []
+        for station, values in enumerate(pose, start=1):
+            header = f"0{station} ".encode()
+            if self.binary:
+                records.append(header + struct.pack("<6f", *values) + b"\r\n")
+            else:
+                records.append(header + "".join(f"{value:7.2f}" for value in values).encode() + b"\r\n")
+
+        return b"".join(records)
+
+    def _handle_command(self, command: bytes):
+        if command == b"W":
+            self.reset()
+        elif command == b"u":
+            self.metric = True
+        elif command == b"U":
+            self.metric = False
+        elif command == b"f":
+            self.binary = True
+        elif command == b"F":
+            self.binary = False
+        elif command == b"C":
+            self.continuous = True
+        elif command == b"c":
+            self.continuous = False
+        elif command == b"P":
+            self._send_frame()
+
+    def _send_frame(self):
+        pose = self.pose(time.perf_counter() - self._start_time)
+        try:
+            os.write(self._master, self.format_frame(pose[:self.n_receivers]))
+            self.frames_sent += 1
+        except BlockingIOError: # the client is not reading fast enough
+            self.frames_dropped += 1
+
+    def _run(self):
+        next_frame = time.perf_counter()
+        next_press = None
+
+        while not self._stop_event.is_set():
+            if next_press is None and self.press_interval and self._script_event.is_set():
+                next_press = time.perf_counter() + self.press_interval
+
+            deadlines = [next_frame] if self.continuous else []
+            if next_press is not None:
+                deadlines.append(next_press)
+            wait = max(0, min(deadlines) - time.perf_counter()) if deadlines else 0.05
+
+            readable, _, _ = select.select([self._master], [], [], min(wait, 0.05))
+            if readable:
+                try:
+                    commands = os.read(self._master, 1024)
+                except (BlockingIOError, OSError):
+                    commands = b""
+                for i in range(len(commands)):
+                    self._handle_command(commands[i:i + 1])
+
+            now = time.perf_counter()
+            if self.continuous and now >= next_frame:
+                self._send_frame()
+                next_frame += 1 / self.rate
+                if next_frame < now: # do not try to catch up on a backlog of missed frames
+                    next_frame = now
+            elif not self.continuous:
+                next_frame = now
+
+            if next_press is not None and now >= next_press:
+                if not self.continuous:
+                    self._send_frame()
+                next_press += self.press_interval
+
+            if self._press_event.is_set():
+                self._press_event.clear()
+                if not self.continuous:
+                    self._send_frame()
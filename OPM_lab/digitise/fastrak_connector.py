@@ -1,11 +1,136 @@
+import math
 import serial
+import struct
 import time
+import threading
+from functools import lru_cache
 import numpy as np
+from .ring_buffer import FrameRingBuffer
+from .instrumentation import NULL_TIMER
+
+# Length in bytes of a single receiver record for the default output list (position, euler angles, CR/LF).
+# ASCII: 3 header bytes + 6 fields of 7 characters + CR/LF
+# binary: 3 header bytes + 6 little-endian IEEE floats + CR/LF
+RECORD_LENGTH = {"ascii": 47, "binary": 29}
+
+# the FASTRAK has four receiver ports
+MAX_RECEIVERS = 4
+
+# every record starts with the record type "0" and the station number as an ASCII digit
+RECORD_HEADERS = [b"0%d" % station for station in range(1, MAX_RECEIVERS + 1)]
+
+# Seconds a single read of the serial port blocks at most. Set once on the port, so waiting for a frame with a
+# timeout never reconfigures the port; the reader checks its own deadline between reads.
+READ_SLICE = 0.05
+
+
+@lru_cache(maxsize=None)
+def binary_frame_struct(n_records: int):
+    """
+    Precompiled decoder of n_records binary records, skipping the header and CR/LF bytes of every record.
+    """
+    return struct.Struct("<" + "3x6f2x" * n_records)
+
+
+def split_frame(buffer: bytearray, n_receivers: int, data_length: int, output_format: str):
+    """
+    Take the first complete frame (one record from every receiver, in station order) from the start of buffer.
+
+    Every record is checked on its "0<station>" header and on its length (ASCII, split on line endings) or its
+    CR/LF bytes (binary). Bytes that do not belong to a valid frame, e.g. around a stray or dropped byte, are
+    discarded up to the start of the next frame, so the reader gets back in step with the records on its own.
+
+    Args:
+        buffer (bytearray): Bytes received from the device. The bytes of the returned frame and any discarded
+            bytes are removed from it.
+        n_receivers (int): The number of records in a frame.
+        data_length (int): The length in bytes of a record, including CR/LF.
+        output_format (str): Either "ascii" or "binary".
+
+    Returns:
+        tuple: The frame (a list of ASCII records without line endings, or the bytes of the binary records), or None
+        if buffer does not hold a complete frame yet, and the number of frames discarded.
+    """
+    if output_format == "binary":
+        return _split_binary_frame(buffer, n_receivers, data_length)
+    return _split_ascii_frame(buffer, n_receivers, data_length)
+
+
+def _split_ascii_frame(buffer: bytearray, n_receivers: int, data_length: int):
+    records = []
+    frame_start = position = 0
+    n_discarded = 0
+
+    while len(records) < n_receivers:
+        end = buffer.find(b"\n", position)
+        if end < 0:
+            if len(buffer) - position > data_length: # no line ending where one was due
+                records, position = [], len(buffer)
+                n_discarded += 1
+            break
+
+        record = bytes(buffer[position:end]).rstrip(b"\r")
+        line_start, position = position, end + 1
+        if not record: # blank line
+            continue
+        if len(record) > data_length - 2 and record[2 - data_length:][:2] in RECORD_HEADERS:
+            record = record[2 - data_length:] # stray bytes before the header
+
+        if len(record) == data_length - 2 and record[:2] == RECORD_HEADERS[len(records)]:
+            if not records:
+                frame_start = line_start
+            records.append(record)
+        else:
+            # corrupted or out of order, drop the frame and re-align on the record of the first station
+            well_formed = len(record) == data_length - 2 and record[:2] in RECORD_HEADERS
+            if records or not well_formed: # the rest of an already discarded frame is not counted again
+                n_discarded += 1
+            if well_formed and record[:2] == RECORD_HEADERS[0]:
+                records, frame_start = [record], line_start
+            else:
+                records = []
+
+    if len(records) == n_receivers:
+        del buffer[:position]
+        return records, n_discarded
+
+    # keep the start of an incomplete frame for the next call
+    del buffer[:frame_start if records else position]
+    return None, n_discarded
+
+
+def _split_binary_frame(buffer: bytearray, n_receivers: int, data_length: int):
+    frame_length = n_receivers * data_length
+    start = 0
+
+    while len(buffer) - start >= frame_length:
+        offsets = range(start, start + frame_length, data_length)
+        if all(
+            buffer[offset:offset + 2] == header and buffer[offset + data_length - 2:offset + data_length] == b"\r\n"
+            for offset, header in zip(offsets, RECORD_HEADERS)
+        ):
+            frame = bytes(buffer[start:start + frame_length])
+            del buffer[:start + frame_length]
+            return frame, round(start / frame_length)
+
+        # skip ahead to the next candidate record of the first station
+        start = buffer.find(RECORD_HEADERS[0], start + 1)
+        if start < 0:
+            start = len(buffer) - 1 # the last byte may be the start of the next header
+            break
+
+    # a frame is counted as discarded for every frame length of skipped bytes, so a stray byte is not counted
+    del buffer[:start]
+    return None, round(start / frame_length)
 
 
 class FastrakConnector:
+    # timeout of the serial port, see READ_SLICE
+    _serial_timeout = READ_SLICE
+
     def __init__(
-        self, usb_port: str, stylus_receiver:int=0, head_reference:int=1, data_length:int=47
+        self, usb_port: str, stylus_receiver:int=0, head_reference:int=1, data_length:int=None, output_format:str="ascii", read_timeout:float=None,
+        timer=None, styluses:list[int]=None, secondary_reference:int=None
     ):
         """
         A class to interface with the Polhemus FASTRAK system.
@@ -14,19 +139,60 @@ class FastrakConnector:
             usb_port (str): The USB port to which the Polhemus FASTRAK is connected.
             stylus_receiver (int): The receiver port number for the stylus (default is 0).
             head_reference (int): The receiver port number for the head reference (default is 1).
-            data_length (int): The expected length of data for each receiver reading.
+            data_length (int): The expected length of data for each receiver reading. Defaults to the record length of the output format.
+            output_format (str): Either "ascii" (default) or "binary". In binary mode the records are decoded directly into numpy arrays instead of being parsed as text.
+            read_timeout (float): Seconds to wait for a complete set of records before raising a TimeoutError. None (default) waits indefinitely.
+            timer (StageTimer): Records the time spent waiting for the serial port ("serial_wait"), parsing ("parse") and
+                transforming ("transform") every frame. Instrumentation is disabled by default.
+            styluses (list[int]): The receiver port numbers of the styluses, for digitising with several styluses at
+                once. Defaults to [stylus_receiver]; otherwise the first stylus takes the place of stylus_receiver.
+            secondary_reference (int): The receiver port number of an optional second reference, e.g. to check that
+                the head reference did not move. Its position relative to the head reference is part of every frame.
+
+        Attributes:
+            frames_discarded (int): The number of frames discarded because they were corrupted, e.g. by a stray or
+                dropped byte on the serial line.
+            stream_error (Exception): The error that stopped the reader thread while streaming, if any.
 
         Methods:
-            n_receivers(): Queries the number of active receivers.
+            count_receivers(): Queries the number of active receivers.
             set_factory_software_defaults(): Resets the device to factory defaults.
             clear_old_data(): Clears outdated data from the serial buffer.
             output_metric(): Sets the measurement units to metric.
+            set_output_format(): Switches the device between ASCII and binary records.
             prepare_for_digitisation(): Prepares the device for digitisation use.
+            read_sensor_data(): Reads one record from every receiver.
             get_position_relative_to_head_receiver(): Computes the position from the stylus relative to the head receiver.
+            start_streaming(): Starts reading frames into a ring buffer on a background thread.
+            stop_streaming(): Stops the background thread, raising the error that stopped it, if any.
         """
-        self.stylus_receiver = stylus_receiver
+        if output_format not in RECORD_LENGTH:
+            raise ValueError(f"Invalid output_format {output_format}; must be either 'ascii' or 'binary'.")
+
+        self.styluses = list(styluses) if styluses is not None else [stylus_receiver]
+        self.stylus_receiver = self.styluses[0]
         self.head_reference = head_reference
-        self.data_length = data_length
+        self.secondary_reference = secondary_reference
+
+        roles = [head_reference, *self.styluses] + ([secondary_reference] if secondary_reference is not None else [])
+        if len(set(roles)) != len(roles):
+            raise ValueError(f"Each receiver can only have one role, got the receivers {roles}.")
+        if min(roles) < 0 or max(roles) >= MAX_RECEIVERS:
+            raise ValueError(f"Receiver port numbers must be between 0 and {MAX_RECEIVERS - 1}, got {roles}.")
+        self.n_required_receivers = max(roles) + 1
+        self.output_format = output_format
+        self.data_length = data_length if data_length else RECORD_LENGTH[output_format]
+        self.read_timeout = read_timeout
+        self._buffer = bytearray() # bytes received that do not form a complete frame yet
+        self.frames_discarded = 0
+        self.timer = timer if timer is not None else NULL_TIMER
+
+        # streaming state, see start_streaming()
+        self.stream = None
+        self._continuous_output = False
+        self._stop_event = threading.Event()
+        self._reader_thread = None
+        self.stream_error = None
 
         # initialize serial object
         self.serialobj = serial.Serial(
@@ -36,25 +202,28 @@ class FastrakConnector:
             parity=serial.PARITY_NONE,  # No parity
             bytesize=serial.EIGHTBITS,  # 8 data bits
             rtscts=False,  # No hardware flow control
-            timeout=1,  # Read timeout in seconds
+            timeout=self._serial_timeout,  # Read timeout in seconds, see READ_SLICE
             write_timeout=1,  # Write timeout in seconds
             xonxoff=False,  # No software flow control
         )
 
-    def send_serial_command(self, command:bytes, sleep_time:float=0.1):
+    def _write_command(self, command:bytes):
         try:
             self.serialobj.write(command)
-            time.sleep(sleep_time)
         except serial.SerialTimeoutException:
             print("Serial write timeout occurred.")
         except serial.SerialException as e:
             print(f"Serial communication error: {e}")
 
-    def n_receivers(self):
+    def send_serial_command(self, command:bytes, sleep_time:float=0.1):
+        self._write_command(command)
+        time.sleep(sleep_time)
+
+    def count_receivers(self):
         self.send_serial_command(b"P")  # Send 'P' command to request number of probes
 
         # Initialize the number of receivers
-        self.n_receivers = 0
+        n_receivers = 0
 
         # Check for available data in the serial buffer
         while self.serialobj.in_waiting > 0:
@@ -64,21 +233,34 @@ class FastrakConnector:
             )  # Read and decode a single line
 
             if line:  # If the line is not empty
-                self.n_receivers += 1  # Increment receiver count
+                n_receivers += 1  # Increment receiver count
+
+        self._set_receiver_count(n_receivers)
 
-        if self.n_receivers != 2:
-            raise ValueError
+    # the former name, shadowed by the count once the receivers have been queried
+    n_receivers = count_receivers
+
+    def _set_receiver_count(self, n_receivers:int):
+        self.n_receivers = n_receivers
+        if self.n_receivers < self.n_required_receivers or self.n_receivers > MAX_RECEIVERS:
+            raise ValueError(
+                f"{self.n_receivers} receivers answered, the receiver roles require {self.n_required_receivers}."
+            )
+
+    # The commands below return the result of send_serial_command, so they can be shared with AsyncFastrakConnector,
+    # whose send_serial_command is a coroutine.
 
     def set_factory_software_defaults(self):
         """
         Resets the device to its factory software defaults by sending the appropriate command.
         """
-        self.send_serial_command(b"W")  # Send 'W' command
+        return self.send_serial_command(b"W")  # Send 'W' command
 
     def clear_old_data(self):
         """
         Checks if there are bytes waiting in the buffer. If so it reads and discards.
         """
+        self._buffer.clear()
         while self.serialobj.in_waiting > 0:
             self.serialobj.read(self.serialobj.in_waiting)
 
@@ -86,106 +268,285 @@ class FastrakConnector:
         """
         Changes the output to centimeters instead of inches
         """
-        self.send_serial_command(b"u")  # send 'u' command to set metric units
+        return self.send_serial_command(b"u")  # send 'u' command to set metric units
+
+    def set_output_format(self):
+        """
+        Sets the record format of the device according to output_format ('f' for binary, 'F' for ASCII)
+        """
+        return self.send_serial_command(b"f" if self.output_format == "binary" else b"F")
+
+    def _prepare_steps(self):
+        return [
+            self.set_factory_software_defaults,
+            self.clear_old_data,
+            self.output_metric,
+            self.count_receivers, # counting the receivers relies on ASCII records, so the format is set afterwards
+            self.set_output_format,
+            self.clear_old_data,
+        ]
 
     def prepare_for_digitisation(self):
-        self.set_factory_software_defaults()
-        self.clear_old_data()
-        self.output_metric()
-        self.n_receivers()
+        for step in self._prepare_steps():
+            step()
 
-        if self.n_receivers != 2:
+        if self.n_receivers < self.n_required_receivers:
             print(
-                "Make sure both receivers are connected - stylus in port 1 and head reference in port 2"
+                f"Make sure all receivers are connected - stylus in port {self.stylus_receiver + 1} and head reference "
+                f"in port {self.head_reference + 1}"
             )
 
-    def get_position_relative_to_head_receiver(self):
-        # wait for all data from the receivers to arrive in the buffer
-        while self.serialobj.in_waiting < self.n_receivers * self.data_length:
-            pass
+    def _count_discarded(self, n_frames:int):
+        self.frames_discarded += n_frames
+        self.timer.dropped(n_frames)
 
-        # Convert ASCII data into numbers and store in sensor_data array
-        sensor_data = np.zeros((7, self.n_receivers))
-
-        for j in range(self.n_receivers):
-            ftstring = self.serialobj.readline().decode().strip()
-            header, x, y, z, azimuth, elevation, roll = self.ftformat(ftstring)
-
-            sensor_data[0, j] = header
-            sensor_data[1, j] = x
-            sensor_data[2, j] = y
-            sensor_data[3, j] = z
-            sensor_data[4, j] = azimuth
-            sensor_data[5, j] = elevation
-            sensor_data[6, j] = roll
-
-        # Get sensor position relative to head reference
-        sensor_position = self.rotate_and_translate(
-            sensor_data[1, self.head_reference],
-            sensor_data[2, self.head_reference],
-            sensor_data[3, self.head_reference],
-            sensor_data[4, self.head_reference],
-            sensor_data[5, self.head_reference],
-            sensor_data[6, self.head_reference],
-            sensor_data[1, self.stylus_receiver],
-            sensor_data[2, self.stylus_receiver],
-            sensor_data[3, self.stylus_receiver],
-        )
+    def _read_frame(self, deadline:float=None):
+        """
+        Blocks until a complete frame has been received, see split_frame. The wait is done by the serial driver in
+        reads of at most READ_SLICE seconds, so no CPU is used while waiting for the operator to press the stylus.
+
+        Args:
+            deadline (float): time.perf_counter() value after which a TimeoutError is raised. None waits indefinitely.
+        """
+        while True:
+            frame, n_discarded = split_frame(self._buffer, self.n_receivers, self.data_length, self.output_format)
+            if n_discarded:
+                self._count_discarded(n_discarded)
+            if frame is not None:
+                return frame
+
+            if deadline is not None and time.perf_counter() >= deadline:
+                raise TimeoutError(f"No complete frame received from the FASTRAK in time ({len(self._buffer)} bytes pending)")
+
+            self._buffer += self.serialobj.read(max(self.serialobj.in_waiting, 1))
+
+    def read_sensor_data(self, timeout:float=None):
+        """
+        Reads one record from each receiver. Frames that are corrupted (e.g. by a stray, dropped or flipped byte)
+        are discarded, counted in frames_discarded, and the next frame is read instead.
+
+        Args:
+            timeout (float): Seconds to wait for the records. Defaults to read_timeout.
+
+        Returns:
+            np.ndarray: Array of shape (7, n_receivers) with header, x, y, z, azimuth, elevation and roll for each receiver.
+        """
+        if timeout is None:
+            timeout = self.read_timeout
+        deadline = None if timeout is None else time.perf_counter() + timeout
+
+        while True:
+            # wait for all data from the receivers to arrive
+            with self.timer.stage("serial_wait"):
+                frame = self._read_frame(deadline)
+            self.timer.frame()
+
+            with self.timer.stage("parse"):
+                try:
+                    return self.decode_frame(frame, self.output_format)
+                except ValueError: # a corrupted field, e.g. "x0" as header or a non-ASCII byte
+                    self._count_discarded(1)
+
+    def get_positions_relative_to_head_receiver(self, timeout:float=None):
+        """
+        Reads a frame and transforms the positions of all receivers into the frame of the head reference, in one
+        vectorized pass.
+
+        Returns:
+            tuple: sensor_data (7, n_receivers) and the positions (n_receivers, 3), row i being receiver i relative to
+            the head reference (zero for the head reference itself).
+        """
+        sensor_data = self.read_sensor_data(timeout)
+        return sensor_data, self._relative_positions(sensor_data)
+
+    def _relative_positions(self, sensor_data:np.ndarray):
+        with self.timer.stage("transform"):
+            others = np.arange(sensor_data.shape[1]) != self.head_reference
+            positions = np.zeros((sensor_data.shape[1], 3))
+            positions[others] = self.rotate_and_translate_batch(
+                sensor_data[1:4, self.head_reference][np.newaxis],
+                sensor_data[4:7, self.head_reference][np.newaxis],
+                sensor_data[1:4, others].T[np.newaxis],
+            )[0]
+
+        return positions
+
+    def get_position_relative_to_head_receiver(self, timeout:float=None):
+        """
+        Returns:
+            tuple: sensor_data (7, n_receivers) and the position of the (first) stylus relative to the head reference.
+        """
+        sensor_data, positions = self.get_positions_relative_to_head_receiver(timeout)
+        return sensor_data, positions[self.stylus_receiver]
+
+    def get_stylus_positions(self, timeout:float=None):
+        """
+        Returns:
+            tuple: sensor_data (7, n_receivers) and the positions of all styluses relative to the head reference,
+            shape (n_styluses, 3) in the order of self.styluses.
+        """
+        sensor_data, positions = self.get_positions_relative_to_head_receiver(timeout)
+        return sensor_data, positions[self.styluses]
+
+    def start_streaming(self, capacity:int=4096, continuous_output:bool=True):
+        """
+        Starts a reader thread that decodes every frame from the device into a ring buffer (self.stream),
+        so acquisition keeps up with the device rate independently of how often the frames are consumed.
+        While streaming, frames should only be read through self.stream.
+
+        Args:
+            capacity (int): The number of frames kept in the ring buffer.
+            continuous_output (bool): Whether to put the device in continuous output mode ('C' command). If False,
+                the frames the device outputs on its own (e.g. when the stylus is pressed) are buffered.
+
+        Returns:
+            FrameRingBuffer: The buffer the frames are written to.
+        """
+        if self._reader_thread is not None:
+            raise RuntimeError("Already streaming, call stop_streaming() first.")
+
+        # one stylus position per frame, or one per stylus when digitising with several styluses
+        position_shape = (3,) if len(self.styluses) == 1 else (len(self.styluses), 3)
+        self.stream = FrameRingBuffer(capacity, self.n_receivers, position_shape)
+        self._continuous_output = continuous_output
+
+        if continuous_output:
+            self.send_serial_command(b"C") # send 'C' command to start continuous output
+
+        self.stream_error = None
+        self._stop_event.clear()
+        self._reader_thread = threading.Thread(target=self._stream_frames, daemon=True)
+        self._reader_thread.start()
+
+        return self.stream
+
+    @property
+    def streaming(self):
+        """
+        Whether the reader thread is running. False once it stopped on an error, see stream_error.
+        """
+        return self._reader_thread is not None and self._reader_thread.is_alive()
+
+    def stop_streaming(self):
+        """
+        Stops the reader thread and, if enabled, the continuous output of the device.
+        The frames already in self.stream are kept.
+
+        Raises:
+            RuntimeError: If the reader thread stopped on an error (e.g. the device was disconnected), after cleaning up.
+        """
+        if self._reader_thread is None:
+            return
 
-        return sensor_data, sensor_position[:3]
+        self._stop_event.set()
+        self._reader_thread.join()
+        self._reader_thread = None
+
+        if self._continuous_output:
+            self.send_serial_command(b"c") # send 'c' command to stop continuous output
+            self._continuous_output = False
+
+        if self.stream_error is not None:
+            self._buffer.clear() # the port itself may be unusable
+            raise RuntimeError(f"Streaming from the FASTRAK stopped on an error: {self.stream_error}") from self.stream_error
+
+        self.clear_old_data()
+
+    def _stream_frames(self, poll_interval:float=0.1):
+        try:
+            while not self._stop_event.is_set():
+                try:
+                    sensor_data, position = self.get_stylus_positions(timeout=poll_interval)
+                except TimeoutError: # check whether to stop, then keep waiting
+                    continue
+                except ValueError: # a frame that could not be decoded, drop it and keep reading
+                    self._count_discarded(1)
+                    continue
+
+                self.stream.append(time.perf_counter(), sensor_data, position.reshape(self.stream.position_shape))
+        except Exception as e: # e.g. the serial port was closed or disconnected
+            self.stream_error = e
+            print(f"Streaming from the FASTRAK stopped: {e}")
 
     @staticmethod
     def rotate_and_translate(xref:float, yref:float, zref:float, azi:float, ele:float, rol:float, xraw:float, yraw:float, zraw:float):
+        """
+        Transform a single raw position into the frame of the reference receiver.
+        Computed directly with scalar math, as numpy has too much overhead for one sample; see
+        rotate_and_translate_batch for transforming many samples at once.
+        """
         # Convert angles to radians
-        azi = -np.deg2rad(azi)
-        ele = -np.deg2rad(ele)
-        rol = -np.deg2rad(rol)
-
-        # Rotation matrix around x-axis (roll)
-        rx = np.array(
-            [
-                [1, 0, 0, 0],
-                [0, np.cos(rol), np.sin(rol), 0],
-                [0, -np.sin(rol), np.cos(rol), 0],
-                [0, 0, 0, 1],
-            ]
-        )
+        azi, ele, rol = -math.radians(azi), -math.radians(ele), -math.radians(rol)
 
-        # Rotation matrix around y-axis (elevation)
-        ry = np.array(
-            [
-                [np.cos(ele), 0, -np.sin(ele), 0],
-                [0, 1, 0, 0],
-                [np.sin(ele), 0, np.cos(ele), 0],
-                [0, 0, 0, 1],
-            ]
-        )
+        ca, sa = math.cos(azi), math.sin(azi)
+        ce, se = math.cos(ele), math.sin(ele)
+        cr, sr = math.cos(rol), math.sin(rol)
 
-        # Rotation matrix around z-axis (azimuth)
-        rz = np.array(
-            [
-                [np.cos(azi), np.sin(azi), 0, 0],
-                [-np.sin(azi), np.cos(azi), 0, 0],
-                [0, 0, 1, 0],
-                [0, 0, 0, 1],
-            ]
-        )
+        # translate so the reference is in the origin
+        x, y, z = xraw - xref, yraw - yref, zraw - zref
+
+        # Apply inverse rotations, same matrix as rotation_matrices
+        return np.array([
+            ca * ce * x - sa * ce * y + se * z,
+            (ca * se * sr + sa * cr) * x + (-sa * se * sr + ca * cr) * y - ce * sr * z,
+            (-ca * se * cr + sa * sr) * x + (sa * se * cr + ca * sr) * y + ce * cr * z,
+        ])
+
+    @staticmethod
+    def rotation_matrices(ref_ori:np.ndarray):
+        """
+        Build the rotation matrices mapping positions into the frame of the reference receiver.
+
+        Args:
+            ref_ori (np.ndarray): Array of shape (N, 3) with azimuth, elevation and roll of the reference in degrees.
 
-        # Translation matrix
-        tm = np.array([[1, 0, 0, -xref], [0, 1, 0, -yref], [0, 0, 1, -zref], [0, 0, 0, 1]])
+        Returns:
+            np.ndarray: Array of shape (N, 3, 3). Equivalent to rx.T @ ry.T @ rz.T for each sample.
+        """
+        # Convert angles to radians
+        azi, ele, rol = -np.deg2rad(np.asarray(ref_ori, dtype=float)).T
+
+        ca, sa = np.cos(azi), np.sin(azi)
+        ce, se = np.cos(ele), np.sin(ele)
+        cr, sr = np.cos(rol), np.sin(rol)
+
+        # (rz @ ry @ rx).T written out element-wise
+        rot = np.empty((len(azi), 3, 3))
+        rot[:, 0, 0] = ca * ce
+        rot[:, 0, 1] = -sa * ce
+        rot[:, 0, 2] = se
+        rot[:, 1, 0] = ca * se * sr + sa * cr
+        rot[:, 1, 1] = -sa * se * sr + ca * cr
+        rot[:, 1, 2] = -ce * sr
+        rot[:, 2, 0] = -ca * se * cr + sa * sr
+        rot[:, 2, 1] = sa * se * cr + ca * sr
+        rot[:, 2, 2] = ce * cr
+
+        return rot
+
+    @staticmethod
+    def rotate_and_translate_batch(ref_pos:np.ndarray, ref_ori:np.ndarray, raw_pos:np.ndarray):
+        """
+        Transform raw positions into the frame of the reference receiver for N samples at once.
 
-        # Raw data as a 4x1 matrix (homogeneous coordinates)
-        xyzraw = np.array([xraw, yraw, zraw, 1])
+        Args:
+            ref_pos (np.ndarray): Array of shape (N, 3) with the x, y, z position of the reference.
+            ref_ori (np.ndarray): Array of shape (N, 3) with azimuth, elevation and roll of the reference in degrees.
+            raw_pos (np.ndarray): Array of shape (N, 3) or (N, M, 3) with the raw positions to transform,
+                e.g. one stylus position per sample or M receivers per sample.
 
-        # Translate the raw data
-        xyzt = np.dot(tm, xyzraw)
+        Returns:
+            np.ndarray: The transformed positions, same shape as raw_pos.
+        """
+        ref_pos = np.asarray(ref_pos, dtype=float)
+        raw_pos = np.asarray(raw_pos, dtype=float)
+        rot = FastrakConnector.rotation_matrices(ref_ori)
 
-        # Apply inverse rotations to align the point with the reference frame
-        xyz = np.dot(rz.T, xyzt)
-        xyz = np.dot(ry.T, xyz)
-        xyz = np.dot(rx.T, xyz)
+        # translate so the reference is in the origin, broadcasting over any receiver axes
+        translated = raw_pos - ref_pos.reshape(ref_pos.shape[:1] + (1,) * (raw_pos.ndim - 2) + (3,))
 
-        return xyz[:3] 
+        # Apply inverse rotations to align the points with the reference frame
+        return np.einsum("nij,n...j->n...i", rot, translated)
 
     @staticmethod
     def ftformat(data):
@@ -206,3 +567,40 @@ class FastrakConnector:
         roll = float(data[38:46].strip())
 
         return header, x, y, z, azimuth, elevation, roll
+
+    @staticmethod
+    def decode_frame(frame, output_format:str):
+        """
+        Decode a frame returned by split_frame into an array of shape (7, n_receivers) with header, x, y, z,
+        azimuth, elevation and roll for each receiver.
+        """
+        if output_format == "binary":
+            return FastrakConnector.ftformat_binary(frame)
+
+        # Convert ASCII data into numbers and store in sensor_data array
+        sensor_data = np.zeros((7, len(frame)))
+        for j, record in enumerate(frame):
+            sensor_data[:, j] = FastrakConnector.ftformat(record.decode())
+
+        return sensor_data
+
+    @staticmethod
+    def ftformat_binary(data:bytes):
+        """
+        Decode one or more binary records from the fastrak into an array with the same layout as the ASCII path
+
+        Args:
+            data (bytes): Concatenated binary records, one per receiver.
+
+        Returns:
+            np.ndarray: Array of shape (7, n_records) with header, x, y, z, azimuth, elevation and roll.
+        """
+        record_length = RECORD_LENGTH["binary"]
+        n_records = len(data) // record_length
+
+        sensor_data = np.empty((7, n_records))
+        # the station number is the second header byte, as an ASCII digit, e.g. b"01 " -> 1
+        sensor_data[0] = [station - ord("0") for station in data[1:n_records * record_length:record_length]]
+        sensor_data[1:] = np.array(binary_frame_struct(n_records).unpack_from(data)).reshape(n_records, 6).T
+
+        return sensor_data
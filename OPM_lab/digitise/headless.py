@@ -0,0 +1,72 @@
+import time
+from .digitising import Digitiser
+
+
+class HeadlessDigitiser(Digitiser):
+    """
+    Runs the same digitisation scheme as Digitiser without a GUI, for remote sessions, scripted head-shape sweeps and
+    automated tests. Acquisition is driven directly, feedback is given in the terminal and through sound, and
+    matplotlib is never imported.
+
+    Takes the same arguments as Digitiser; y_lim and blit have no effect.
+
+    Example:
+        digitiser = HeadlessDigitiser(connector=connector, journal_path="sub-01.journal")
+        digitiser.add(category="fiducials", labels=["lpa", "nasion", "rpa"], dig_type="single")
+        digitiser.add(category="head", n_points=200, dig_type="continuous", min_spacing=0.5)
+        digitiser.run_digitisation()
+        digitiser.save_digitisation("sub-01_digitisation.npz")
+    """
+    # seconds between checks for newly streamed frames in continuous steps
+    poll_interval = 0.05
+
+    def on_step_complete(self):
+        self.step_complete = True
+
+    def print_instructions(self):
+        """
+        Print the point to digitise next.
+        """
+        if self.current_dig_type == "continuous":
+            print(f"\r{self.current_category}: {self.current_label_idx} of {self.n_points} points", end="", flush=True)
+        else:
+            print(f"{self.current_category}: digitise {self.current_label} (point {self.current_label_idx + 1} of {self.n_points})")
+
+    def acquire(self):
+        """
+        Acquire until the label index changes or, for continuous steps, for one poll interval.
+        """
+        with self.timer.stage("acquire"):
+            if self.current_dig_type == "single":
+                self.handle_single_digitisation(None)
+            else:
+                time.sleep(self.poll_interval)
+                self.handle_continuous_digitisation(None)
+
+        if self.journal is not None:
+            with self.timer.stage("journal_sync"):
+                self.journal.sync()
+
+    def run_digitisation(self):
+        for dig, (start, n_completed) in zip(self.digitisation_scheme, self.completed_steps()):
+            n_points = dig["n_points"] if dig["n_points"] else len(dig["labels"])
+            if n_completed == n_points: # already digitised before resuming
+                continue
+
+            self.setup_step(dig, start, n_completed)
+            self.step_complete = False
+            displayed_label_idx = None
+            try:
+                while not self.step_complete:
+                    if self.current_label_idx != displayed_label_idx:
+                        self.print_instructions()
+                        displayed_label_idx = self.current_label_idx
+                    self.acquire()
+            finally:
+                if self.current_dig_type == "continuous":
+                    self.print_instructions()
+                    print() # end the progress line
+                self.finish_step()
+
+            print(f"Done digitising {self.current_category}")
+            self.play_sound("done")
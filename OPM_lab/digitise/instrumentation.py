@@ -0,0 +1,203 @@
+import itertools
+import threading
+from pathlib import Path
+from time import perf_counter_ns
+import numpy as np
+import pandas as pd
+
+
+class _StageContext:
+    # one per stage() call, so a stage can be timed from several threads at once or nested within itself
+    __slots__ = ("timer", "code", "start")
+
+    def __init__(self, timer, code: int):
+        self.timer = timer
+        self.code = code
+        self.start = 0
+
+    def __enter__(self):
+        self.start = perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self.timer.record(self.code, self.start, perf_counter_ns())
+
+
+class _NullContext:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+
+class StageTimer:
+    enabled = True
+
+    def __init__(self, capacity: int = 100_000):
+        """
+        Records the duration of the stages of the digitisation loop (e.g. waiting for the serial port, parsing,
+        plotting) and the arrival time of every frame, with perf_counter_ns.
+
+        The records are written into preallocated arrays, overwriting the oldest records when full, so recording
+        does not allocate. Recording is safe from several threads (e.g. the streaming thread of the connector and
+        the animation).
+
+        Args:
+            capacity (int): The number of stage and frame records kept.
+
+        Example:
+            timer = StageTimer()
+            with timer.stage("parse"):
+                ...
+            timer.report()
+        """
+        self.capacity = capacity
+        self.stages: list[str] = []
+        self._stage_codes_by_name: dict[str, int] = {}
+        self._register_lock = threading.Lock()
+
+        self._stage_codes = np.zeros(capacity, dtype=np.int16)
+        self._starts = np.zeros(capacity, dtype=np.int64)
+        self._durations = np.zeros(capacity, dtype=np.int64)
+        self._frames = np.zeros(capacity, dtype=np.int64)
+
+        # next() on itertools.count is atomic, so threads never write to the same slot
+        self._record_counter = itertools.count()
+        self._frame_counter = itertools.count()
+        self.n_records = 0
+        self.n_frames = 0
+        self.frames_dropped = 0
+
+    def stage(self, name: str):
+        """
+        Context manager timing one execution of a stage.
+        """
+        code = self._stage_codes_by_name.get(name)
+        if code is None:
+            with self._register_lock:
+                code = self._stage_codes_by_name.get(name)
+                if code is None:
+                    code = len(self.stages)
+                    self.stages.append(name)
+                    self._stage_codes_by_name[name] = code
+        return _StageContext(self, code)
+
+    def record(self, code: int, start_ns: int, stop_ns: int):
+        idx = next(self._record_counter)
+        slot = idx % self.capacity
+        self._stage_codes[slot] = code
+        self._starts[slot] = start_ns
+        self._durations[slot] = stop_ns - start_ns
+        self.n_records = max(self.n_records, idx + 1)
+
+    def frame(self):
+        """
+        Mark the arrival of a frame from the device.
+        """
+        idx = next(self._frame_counter)
+        self._frames[idx % self.capacity] = perf_counter_ns()
+        self.n_frames = max(self.n_frames, idx + 1)
+
+    def dropped(self, n_frames: int):
+        """
+        Count frames that were lost before they were processed.
+        """
+        self.frames_dropped += n_frames
+
+    def _ordered(self, array: np.ndarray, n: int):
+        # the kept records in the order they were recorded
+        if n <= self.capacity:
+            return array[:n]
+        return np.roll(array, -(n % self.capacity))
+
+    def to_dataframe(self):
+        """
+        Returns:
+            pd.DataFrame: One row per stage record with columns ["stage", "start_ns", "duration_ns"].
+        """
+        codes = self._ordered(self._stage_codes, self.n_records)
+        return pd.DataFrame({
+            "stage": pd.Categorical.from_codes(codes, categories=self.stages),
+            "start_ns": self._ordered(self._starts, self.n_records),
+            "duration_ns": self._ordered(self._durations, self.n_records),
+        })
+
+    def summary(self):
+        """
+        Returns:
+            dict: "stages", a DataFrame with the count, p50, p95 and max duration (ms) of every stage, "frames",
+            the number of frames received, "frames_dropped" and "effective_rate" (frames per second).
+        """
+        codes = self._ordered(self._stage_codes, self.n_records)
+        durations_ms = self._ordered(self._durations, self.n_records) / 1e6
+
+        rows = {}
+        for code, name in enumerate(self.stages):
+            stage_durations = durations_ms[codes == code]
+            if len(stage_durations):
+                p50, p95 = np.percentile(stage_durations, [50, 95])
+                rows[name] = {"count": len(stage_durations), "p50_ms": p50, "p95_ms": p95, "max_ms": stage_durations.max()}
+
+        frames = self._ordered(self._frames, self.n_frames)
+        effective_rate = np.nan
+        if len(frames) > 1 and frames[-1] > frames[0]:
+            effective_rate = (len(frames) - 1) / ((frames[-1] - frames[0]) / 1e9)
+
+        return {
+            "stages": pd.DataFrame.from_dict(rows, orient="index", columns=["count", "p50_ms", "p95_ms", "max_ms"]),
+            "frames": self.n_frames,
+            "frames_dropped": self.frames_dropped,
+            "effective_rate": effective_rate,
+        }
+
+    def report(self):
+        """
+        Print the summary statistics.
+        """
+        summary = self.summary()
+        print(summary["stages"].round(3).to_string())
+        print(
+            f"{summary['frames']} frames received, {summary['frames_dropped']} dropped, "
+            f"effective rate {summary['effective_rate']:.1f} Hz"
+        )
+
+    def save(self, output_path: Path):
+        """
+        Save the raw records to an .npz file with the arrays "stages", "stage_codes", "start_ns", "duration_ns",
+        "frame_ns" and "frames_dropped".
+        """
+        np.savez(
+            Path(output_path),
+            stages=np.array(self.stages, dtype=str),
+            stage_codes=self._ordered(self._stage_codes, self.n_records),
+            start_ns=self._ordered(self._starts, self.n_records),
+            duration_ns=self._ordered(self._durations, self.n_records),
+            frame_ns=self._ordered(self._frames, self.n_frames),
+            frames_dropped=self.frames_dropped,
+        )
+
+
+class NullTimer:
+    """
+    Stand-in for StageTimer when instrumentation is disabled, every call is a no-op.
+    """
+    enabled = False
+    _context = _NullContext()
+
+    def stage(self, name: str):
+        return self._context
+
+    def frame(self):
+        pass
+
+    def dropped(self, n_frames: int):
+        pass
+
+    def report(self):
+        print("Instrumentation is disabled.")
+
+
+NULL_TIMER = NullTimer()
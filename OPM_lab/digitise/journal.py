@@ -0,0 +1,125 @@
+import os
+from pathlib import Path
+from .point_store import PointStore
+from .digitisation_io import save_digitisation
+
+
+class DigitisationJournal:
+    def __init__(self, path: Path):
+        """
+        Append-only journal of a digitisation session, so a session can be recovered after a crash.
+
+        Every accepted point and every undo is appended as one tab-separated line and flushed to the operating system
+        immediately; sync() additionally forces the data to disk. The format is
+            A<TAB>category<TAB>label<TAB>x<TAB>y<TAB>z
+            U
+        where "A" adds a point and "U" undoes the last one. Replaying the journal gives the points of the session.
+
+        Args:
+            path (Path): The journal file, appended to if it exists.
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        # drop an incomplete last line left by a crash, so new lines are not appended to it
+        if self.path.exists():
+            with self.path.open("rb+") as file:
+                content = file.read()
+                if content and not content.endswith(b"\n"):
+                    file.truncate(content.rfind(b"\n") + 1)
+
+        self._file = self.path.open("a", encoding="utf-8")
+        self._unsynced = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _write(self, line: str):
+        self._file.write(line)
+        self._file.flush()
+        self._unsynced = True
+
+    @staticmethod
+    def check_text(*values: str):
+        """
+        Raise a ValueError if a category or label can not be journaled, as it contains a tab or line break.
+        """
+        for value in values:
+            if any(character in str(value) for character in "\t\r\n"):
+                raise ValueError(f"Categories and labels can not contain tabs or line breaks, got {value!r}.")
+
+    def append(self, category: str, label: str, position):
+        """
+        Record an accepted point.
+        """
+        self.check_text(category, label)
+
+        x, y, z = (float(coordinate) for coordinate in position[:3])
+        self._write(f"A\t{category}\t{label}\t{x!r}\t{y!r}\t{z!r}\n")
+
+    def undo(self):
+        """
+        Record that the last point was removed.
+        """
+        self._write("U\n")
+
+    def sync(self):
+        """
+        Force the lines written since the last sync to disk.
+        """
+        if self._unsynced:
+            os.fsync(self._file.fileno())
+            self._unsynced = False
+
+    def close(self):
+        if not self._file.closed:
+            self.sync()
+            self._file.close()
+
+    @staticmethod
+    def replay(path: Path, points: PointStore = None):
+        """
+        Rebuild the points of a session from its journal. An incomplete last line, left by a crash while writing,
+        is ignored.
+
+        Args:
+            path (Path): The journal file.
+            points (PointStore): Store to add the points to, a new one by default.
+
+        Returns:
+            PointStore: The points of the session.
+        """
+        points = points if points is not None else PointStore()
+
+        with Path(path).open("r", encoding="utf-8") as file:
+            for line_number, line in enumerate(file, start=1):
+                if not line.endswith("\n"):
+                    print(f"Ignoring incomplete line {line_number} at the end of {path}")
+                    break
+
+                record = line.rstrip("\n").split("\t")
+                if record[0] == "A" and len(record) == 6:
+                    points.append(record[1], record[2], [float(value) for value in record[3:]])
+                elif record == ["U"]:
+                    points.pop()
+                else:
+                    raise ValueError(f"Invalid record on line {line_number} of {path}: {line!r}")
+
+        return points
+
+
+def compact_journal(journal_path: Path, output_path: Path):
+    """
+    Replay a journal and save the resulting points as a digitisation file, in any format supported by
+    save_digitisation (e.g. CSV with columns ["category", "label", "x", "y", "z"]).
+
+    Returns:
+        pd.DataFrame: The points of the session.
+    """
+    digitised_points = DigitisationJournal.replay(journal_path).to_dataframe()
+    save_digitisation(digitised_points, output_path)
+
+    return digitised_points
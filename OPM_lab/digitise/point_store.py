@@ -0,0 +1,124 @@
+import numpy as np
+import pandas as pd
+
+
+class PointStore:
+    def __init__(self, capacity: int = 1024):
+        """
+        Array-backed store of digitised points with O(1) (amortised) append and O(1) undo.
+
+        Positions are kept in a preallocated numpy array which is grown by doubling when full. Categories and labels
+        are stored as integer codes into small lookup tables, so a DataFrame is only built when asked for.
+
+        Args:
+            capacity (int): The number of points to preallocate room for.
+
+        Attributes:
+            categories (list[str]): The unique categories, indexed by the category codes.
+            labels (list[str]): The unique labels, indexed by the label codes.
+        """
+        self.categories: list[str] = []
+        self.labels: list[str] = []
+        self._category_codes_lookup: dict[str, int] = {}
+        self._label_codes_lookup: dict[str, int] = {}
+
+        self._n = 0
+        self._xyz = np.empty((capacity, 3))
+        self._category_codes = np.empty(capacity, dtype=np.int32)
+        self._label_codes = np.empty(capacity, dtype=np.int32)
+
+    def __len__(self):
+        return self._n
+
+    @property
+    def empty(self):
+        return self._n == 0
+
+    @property
+    def xyz(self):
+        """
+        View of the positions, shape (n_points, 3).
+        """
+        return self._xyz[:self._n]
+
+    @property
+    def category_codes(self):
+        """
+        View of the category codes, indexing into self.categories.
+        """
+        return self._category_codes[:self._n]
+
+    @property
+    def label_codes(self):
+        """
+        View of the label codes, indexing into self.labels.
+        """
+        return self._label_codes[:self._n]
+
+    @staticmethod
+    def _code(value, table: list, lookup: dict):
+        code = lookup.get(value)
+        if code is None:
+            code = lookup[value] = len(table)
+            table.append(value)
+        return code
+
+    def _grow(self):
+        capacity = 2 * len(self._xyz)
+        for name in ("_xyz", "_category_codes", "_label_codes"):
+            old = getattr(self, name)
+            new = np.empty((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:self._n] = old[:self._n]
+            setattr(self, name, new)
+
+    def append(self, category: str, label: str, position):
+        """
+        Add a point.
+
+        Args:
+            category (str): The category of the point (e.g., 'OPM', 'head').
+            label (str): The label associated with this point.
+            position (tuple): The (x, y, z) coordinates of the point.
+        """
+        if self._n == len(self._xyz):
+            self._grow()
+
+        self._xyz[self._n] = position[:3]
+        self._category_codes[self._n] = self._code(category, self.categories, self._category_codes_lookup)
+        self._label_codes[self._n] = self._code(label, self.labels, self._label_codes_lookup)
+        self._n += 1
+
+    def pop(self):
+        """
+        Remove the last point.
+
+        Returns:
+            tuple: category, label and position of the removed point, or None if the store is empty.
+        """
+        if self._n == 0:
+            return None
+
+        self._n -= 1
+        return (
+            self.categories[self._category_codes[self._n]],
+            self.labels[self._label_codes[self._n]],
+            self._xyz[self._n].copy(),
+        )
+
+    def to_dataframe(self, start: int = 0):
+        """
+        Args:
+            start (int): Index of the first point to include, negative values count from the end.
+
+        Returns:
+            pd.DataFrame: The points with columns ["category", "label", "x", "y", "z"].
+        """
+        region = slice(*slice(start, None).indices(self._n)[:2])
+        xyz = self.xyz[region]
+        return pd.DataFrame({
+            "category": pd.Categorical.from_codes(self.category_codes[region], categories=self.categories),
+            "label": pd.Categorical.from_codes(self.label_codes[region], categories=self.labels),
+            "x": xyz[:, 0].copy(),
+            "y": xyz[:, 1].copy(),
+            "z": xyz[:, 2].copy(),
+        }, index=range(region.start, region.stop))
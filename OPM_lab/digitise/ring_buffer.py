@@ -0,0 +1,102 @@
+import numpy as np
+
+
+class FrameRingBuffer:
+    def __init__(self, capacity: int, n_receivers: int, position_shape: tuple = (3,)):
+        """
+        A fixed-size, preallocated buffer holding the most recent frames streamed from the FASTRAK.
+
+        Every frame is written twice, at slot i and slot i + capacity, so any run of up to capacity consecutive
+        frames is a contiguous region of the storage. All read methods therefore return views and never copy.
+        Views hold at most capacity - 1 frames, so the slot of the next frame is never part of a view. A view of n
+        frames stays valid until the writer has added another capacity - n frames (at least one); copy the data if
+        it needs to be kept for longer.
+
+        Args:
+            capacity (int): The number of frames kept in the buffer, at least 2. The read methods return at most the
+                capacity - 1 newest frames.
+            n_receivers (int): The number of receivers in each frame.
+            position_shape (tuple): Shape of the position stored with each frame, (n_styluses, 3) to store the
+                positions of several styluses.
+
+        Attributes:
+            count (int): The total number of frames appended. Used as the cursor for frames_since().
+        """
+        if capacity < 2:
+            raise ValueError("capacity must be at least 2")
+
+        self.capacity = capacity
+        self.n_receivers = n_receivers
+        self.position_shape = tuple(position_shape)
+        self.count = 0
+
+        self._timestamps = np.zeros(2 * capacity)
+        self._sensor_data = np.zeros((2 * capacity, 7, n_receivers))
+        self._positions = np.zeros((2 * capacity,) + self.position_shape)
+
+    def append(self, timestamp: float, sensor_data: np.ndarray, position: np.ndarray):
+        """
+        Add a frame to the buffer, overwriting the oldest frame when the buffer is full.
+
+        Args:
+            timestamp (float): Time the frame was received (time.perf_counter()).
+            sensor_data (np.ndarray): Array of shape (7, n_receivers), see FastrakConnector.read_sensor_data().
+            position (np.ndarray): The stylus position(s) relative to the head reference, shape position_shape.
+        """
+        i = self.count % self.capacity
+        for idx in (i, i + self.capacity):
+            self._timestamps[idx] = timestamp
+            self._sensor_data[idx] = sensor_data
+            self._positions[idx] = position
+
+        # only publish the frame once it is fully written
+        self.count += 1
+
+    def _views(self, start: int, stop: int):
+        """
+        Views of the frames with absolute frame numbers start to stop (stop - start < capacity).
+        """
+        i = start % self.capacity
+        region = slice(i, i + stop - start)
+        return self._timestamps[region], self._sensor_data[region], self._positions[region]
+
+    def latest_frame(self):
+        """
+        Returns:
+            tuple: timestamp, sensor_data and position of the newest frame, or None if no frames have arrived.
+        """
+        count = self.count
+        if count == 0:
+            return None
+
+        i = (count - 1) % self.capacity
+        return self._timestamps[i], self._sensor_data[i], self._positions[i]
+
+    def frames_since(self, cursor: int = 0):
+        """
+        Get all frames appended since the cursor, at most the capacity - 1 newest ones.
+
+        Args:
+            cursor (int): Absolute frame number to start from, typically the cursor returned by the previous call.
+
+        Returns:
+            tuple: timestamps (n,), sensor_data (n, 7, n_receivers), positions (n, *position_shape), the new cursor and the number
+            of frames that were overwritten before they could be read.
+        """
+        count = self.count
+        start = max(cursor, count - self.capacity + 1)
+
+        return (*self._views(start, count), count, start - cursor)
+
+    def window(self, t_start: float, t_stop: float):
+        """
+        Get the frames received in the interval [t_start, t_stop), from the capacity - 1 newest frames.
+
+        Returns:
+            tuple: timestamps (n,), sensor_data (n, 7, n_receivers) and positions (n, *position_shape).
+        """
+        count = self.count
+        timestamps, sensor_data, positions = self._views(max(0, count - self.capacity + 1), count)
+
+        start, stop = np.searchsorted(timestamps, [t_start, t_stop])
+        return timestamps[start:stop], sensor_data[start:stop], positions[start:stop]
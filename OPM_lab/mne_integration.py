@@ -1,48 +1,54 @@
 from .sensor_position import OPMSensorLayout
-from .utils import determine_conversion_factor
-import pandas as pd
+from .digitise.decimation import decimate_points
+from .digitise.digitisation_io import DigitisedPoints
 from mne.transforms import Transform, _quat_to_affine, _fit_matched_points
 from mne.channels import make_dig_montage
+from mne.io.constants import FIFF
 import numpy as np
 
 
-def add_dig_montage(mne_object, df: pd.DataFrame, unit:str = "m"):
+def _as_digitised_points(digitised_points, unit: str):
+    """
+    Split a digitisation DataFrame into a DigitisedPoints in metres, passing DigitisedPoints through.
+    """
+    if isinstance(digitised_points, DigitisedPoints):
+        return digitised_points
+    return DigitisedPoints.from_dataframe(digitised_points, unit=unit)
+
+
+def add_dig_montage(mne_object, df, unit:str = "m", min_spacing:float = None):
     """
     Adds a digitised montage to the MNE object based on fiducial points and head shape.
     Args:
         mne_object: MNE raw or epochs object.
-        df (pd.DataFrame): DataFrame with columns ["label", "x", "y", "z"].
-        unit (str): Unit of the digitised points, can be "m", "cm" or "mm".
+        df (pd.DataFrame | DigitisedPoints): DataFrame with columns ["label", "x", "y", "z"], or the digitised points
+            as returned by load_digitisation.
+        unit (str): Unit of the digitised points in a DataFrame, can be "m", "cm" or "mm".
+        min_spacing (float): If given, head-shape points closer than min_spacing (m) to an earlier head-shape point
+            are dropped before building the montage.
     """
-    unit_coversion = determine_conversion_factor(unit, "m")
- 
+    points = _as_digitised_points(df, unit)
+
     required_labels = ["nasion", "lpa", "rpa"]
-    if not set(required_labels).issubset(df["label"].unique()):
+    if any(points.fiducials.get(label) is None for label in required_labels):
         raise ValueError(f"DataFrame must contain labels {required_labels}")
 
-    fiducials = {
-        label: df.loc[df["label"] == label, ["x", "y", "z"]].values.squeeze() / unit_coversion
-        for label in required_labels
-    }
-    head_points = df[df["label"] == "head"].loc[:, ["x", "y", "z"]].values / unit_coversion
+    head_points = points.hsp
+    if min_spacing is not None:
+        head_points = head_points[decimate_points(head_points, min_spacing, name="head points")]
 
     # check if eeg channels are present in the digitised points
-    eeg_channels = df[df["category"] == "EEG"]
-
-    if eeg_channels.empty:
+    if not points.eeg_labels:
         print("No channels with category EEG found in the digitised points. Only fiducials and head shape will be used.")
         eeg_channel_pos = None
     else:
-        eeg_channel_pos = {
-            ch["label"]: ch[["x", "y", "z"]].values / unit_coversion
-            for _, ch in eeg_channels.iterrows()
-        }
+        eeg_channel_pos = dict(zip(points.eeg_labels, points.eeg_pos))
 
     dig_montage = make_dig_montage(
         ch_pos=eeg_channel_pos,
-        nasion=fiducials["nasion"],
-        lpa=fiducials["lpa"],
-        rpa=fiducials["rpa"],
+        nasion=points.fiducials["nasion"],
+        lpa=points.fiducials["lpa"],
+        rpa=points.fiducials["rpa"],
         hsp=head_points,
         coord_frame="head"
     )
@@ -50,65 +56,144 @@ def add_dig_montage(mne_object, df: pd.DataFrame, unit:str = "m"):
     mne_object.info.set_montage(dig_montage)
 
 
+def _channel_indices(info, labels):
+    """
+    Look up channels by name, building the name -> index mapping once.
+
+    Args:
+        info: MNE info object.
+        labels (list[str]): Channel names to look up.
+
+    Returns:
+        tuple: np.ndarray of indices (-1 where missing), boolean mask of the labels found and a list of the missing labels.
+    """
+    ch_index = {name: idx for idx, name in enumerate(info["ch_names"])}
+
+    indices = np.array([ch_index.get(label, -1) for label in labels], dtype=int)
+    found = indices >= 0
+    missing = [label for label, is_found in zip(labels, found) if not is_found]
+
+    return indices, found, missing
+
+
 def add_sensor_layout(mne_object, sensor_layout: OPMSensorLayout):
     """
     Updates channel positions and orientations for MNE object based on a sensor layout.
     Args:
         mne_object: MNE object, for example Raw.
         sensor_layout: A layout object containing channel positions, orientations, labels and coil type.
+
+    Returns:
+        dict: Report with the labels of the channels "updated" and the labels "missing" from the MNE object.
     """
+    labels = list(sensor_layout.label)
+    indices, found, missing = _channel_indices(mne_object.info, labels)
 
-    for pos, ori, label in zip(
-        sensor_layout.chan_pos, sensor_layout.chan_ori, sensor_layout.label
-    ):
-        idx = next(
-            (
-                idx
-                for idx, ch in enumerate(mne_object.info["chs"])
-                if ch["ch_name"] == label
-            ),
-            None,
-        )
-        if idx is None:
-            print(f"Warning: Channel {label} not found in MNE object")
-            continue
+    if missing:
+        print(f"Warning: Channels {missing} not found in MNE object")
+
+    # position followed by the flattened orientation, as stored in the loc of a channel
+    chan_pos = np.asarray(sensor_layout.chan_pos).reshape(len(labels), 3)
+    chan_ori = np.asarray(sensor_layout.chan_ori).reshape(len(labels), 9)
+    locs = np.concatenate([chan_pos, chan_ori], axis=1)[found]
 
-        mne_object.info["chs"][idx]["loc"][:3] = pos
-        mne_object.info["chs"][idx]["loc"][3:] = ori.flatten()
-        mne_object.info["chs"][idx]["coil_type"] = sensor_layout.coil_type
+    chs = mne_object.info["chs"]
+    for idx, loc in zip(indices[found], locs):
+        chs[idx]["loc"][:12] = loc
+        chs[idx]["coil_type"] = sensor_layout.coil_type
+
+    return {
+        "updated": [label for label, is_found in zip(labels, found) if is_found],
+        "missing": missing
+    }
 
 
-def add_device_to_head(mne_object, digitised_points, unit="m"):
+def _head_shape_points(mne_object, points: DigitisedPoints):
+    """
+    Head-shape points (m) from the digitised points, or from the digitisation of the MNE object if there are none.
+    """
+    head_points = points.hsp
+    if len(head_points) == 0 and mne_object.info["dig"]:
+        head_points = np.array([
+            dig["r"] for dig in mne_object.info["dig"] if dig["kind"] == FIFF.FIFFV_POINT_EXTRA
+        ]).reshape(-1, 3)
+
+    return head_points
+
+
+def add_device_to_head(
+        mne_object, digitised_points, unit="m", refine=False, ransac_threshold=0.005, scalp_offset=None, **icp_kwargs
+        ):
     """
     Adds a device-to-head transformation to the MNE object.
     Args:
         mne_object: MNE object, such as raw.
-        digitised_points (pd.DataFrame): DataFrame with device sensor positions and labels.
-        unit (str): Unit of the digitised points, can be "m", "cm" or "mm".
+        digitised_points (pd.DataFrame | DigitisedPoints): DataFrame with device sensor positions and labels, or the
+            digitised points as returned by load_digitisation.
+        unit (str): Unit of the digitised points in a DataFrame, can be "m", "cm" or "mm".
+        refine (bool): Reject badly digitised sensors with RANSAC. If scalp_offset is given, the transform is then
+            refined with iterative closest point against the head-shape points (label "head", or the head shape of
+            the MNE object if there are none).
+        ransac_threshold (float): Inlier threshold of the RANSAC stage in m, only used if refine is True.
+        scalp_offset (float | np.ndarray): Distance in m from each sensor position to the scalp along the z-axis of
+            the sensor, a single value or one per sensor in the order of the digitised OPM sensors. Only used if
+            refine is True. The sensors do not lie on the scalp, so without this distance the head-shape points are
+            only used for the surface residuals.
+        **icp_kwargs: Passed to transform_fitting.icp_refine, only used if refine is True and scalp_offset is given.
+
+    Returns:
+        dict: Report with the labels of the channels "used" for the fit, the labels "missing" from the MNE object and,
+        if refine is True, the labels "rejected" as outliers and the "residuals" (distance to the digitised position)
+        and "surface_residuals" (distance to the closest head-shape point) in m for each sensor.
     """
-    # get the unit of the sensor positions in the mne_object
-    unit_coversion = determine_conversion_factor(unit, "m")
-
-    channels = digitised_points[digitised_points["sensor_type"] == "OPM"]
-    sensors_head = channels.loc[:, ["x", "y", "z"]].values / unit_coversion
-    labels = channels["label"]
-
-    sensors_device = []
-    for label in labels:
-        idx = next(
-            (
-                idx
-                for idx, ch in enumerate(mne_object.info["chs"])
-                if ch["ch_name"] == label
-            ),
-            None,
+    points = _as_digitised_points(digitised_points, unit)
+    sensors_head = points.opm_pos
+    labels = points.opm_labels
+
+    indices, found, missing = _channel_indices(mne_object.info, labels)
+    if missing:
+        print(f"Warning: Channels {missing} not found in MNE object")
+
+    chs = mne_object.info["chs"]
+    sensors_device = np.array([chs[idx]["loc"][:3] for idx in indices[found]])
+    sensor_normals = np.array([chs[idx]["loc"][9:12] for idx in indices[found]])
+    found_labels = [label for label, is_found in zip(labels, found) if is_found]
+
+    if not refine:
+        trans = _quat_to_affine(
+            _fit_matched_points(sensors_device, sensors_head[found])[0]
         )
-        if idx is None:
-            print(f"Warning: Channel {label} not found in MNE object")
-            continue
-        sensors_device.append(mne_object.info["chs"][idx]["loc"][:3])
+        mne_object.info["dev_head_t"] = Transform(fro="meg", to="head", trans=trans)
+
+        return {
+            "used": found_labels,
+            "missing": missing
+        }
+
+    from .transform_fitting import fit_device_to_head
 
-    trans = _quat_to_affine(
-        _fit_matched_points(np.array(sensors_device), sensors_head)[0]
+    if scalp_offset is not None and np.ndim(scalp_offset) > 0:
+        scalp_offset = np.asarray(scalp_offset, dtype=float)[found]
+
+    trans, inliers, residuals, surface_residuals = fit_device_to_head(
+        sensors_device,
+        sensors_head[found],
+        _head_shape_points(mne_object, points),
+        ransac_threshold=ransac_threshold,
+        sensor_normals=sensor_normals,
+        scalp_offset=scalp_offset,
+        **icp_kwargs
     )
     mne_object.info["dev_head_t"] = Transform(fro="meg", to="head", trans=trans)
+
+    rejected = [label for label, inlier in zip(found_labels, inliers) if not inlier]
+    if rejected:
+        print(f"Warning: Channels {rejected} rejected as outliers in the device to head fit")
+
+    return {
+        "used": [label for label, inlier in zip(found_labels, inliers) if inlier],
+        "missing": missing,
+        "rejected": rejected,
+        "residuals": dict(zip(found_labels, residuals)),
+        "surface_residuals": dict(zip(found_labels, surface_residuals))
+    }
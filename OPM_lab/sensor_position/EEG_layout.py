@@ -1,6 +1,5 @@
-import mne
-import numpy as np
 from .template_base import TemplateBase
+from .montage_cache import get_montage_information
 
 class EEGcapTemplate(TemplateBase):
     def __init__(self, montage:str):
@@ -9,13 +8,7 @@ class EEGcapTemplate(TemplateBase):
         super().__init__(self.label, self.unit, chan_pos)
     
     def get_montage_information(self):
+        # positions and labels are cached per montage, see montage_cache.get_montage_information
+        positions, labels = get_montage_information(self.montage)
 
-        mne_montage = mne.channels.make_standard_montage(self.montage)
-
-        positions = []
-
-        for digpoint in mne_montage.dig:
-            if digpoint["kind"]==3: # if it is EEG 
-                positions.append(digpoint["r"])        
-
-        return np.array(positions), mne_montage.ch_names, "mm"
\ No newline at end of file
+        return positions, labels, "mm"
@@ -3,6 +3,9 @@ from .helmet_layout import HelmetTemplate
 from mne.utils._bunch import NamedInt
 from .template_base import TemplateBase
 
+# sign of the template z-axis components when moving a sensor by its depth, (x, y, z)
+DEPTH_DIRECTION_SIGN = np.array([-1., -1., 1.])
+
 class OPMSensorLayout(TemplateBase):
     def __init__(self, label:list[str], depth:list[float], helmet_template:HelmetTemplate, coil_type:NamedInt = NamedInt("FieldLine OPM sensor Gen1 size = 2.00   mm", 8101)) -> None:
         """
@@ -29,7 +32,7 @@ class OPMSensorLayout(TemplateBase):
         ----------
         label : list[str]
             The labels identifying the sensor in the template.
-        depth : list[float]
+        depth : np.ndarray
             Depth measurements.
         helmet_template : HelmetTemplate
             The helmet template providing OPM position and orientation.
@@ -37,6 +40,8 @@ class OPMSensorLayout(TemplateBase):
             The unit of measurement from the helmet template.
         coil_type : NamedInt
             The coil type associated with the channel (see https://github.com/mne-tools/mne-python/blob/main/mne/data/coil_def.dat).
+        template_pos : np.ndarray
+            Channel positions in the helmet template before accounting for depth measurement.
         chan_pos : np.ndarray
             Array containing the transformed channel positions after accounting for depth measurement
         chan_ori : list
@@ -44,7 +49,7 @@ class OPMSensorLayout(TemplateBase):
         """
 
         #self.label = label
-        self.depth = depth
+        self.depth = np.array(depth, dtype=float)
         self.helmet_template = helmet_template
         #self.unit = self.
         self.coil_type = coil_type
@@ -52,29 +57,69 @@ class OPMSensorLayout(TemplateBase):
         super().__init__(label, helmet_template.unit, chan_pos)
 
     def make_sensor_layout(self, labels):
-        chan_pos = self.transform_template_depth(labels)
+        self.template_pos = self.helmet_template.get_chs_pos(labels)
         chan_ori = self.helmet_template.get_chs_ori(labels)
+        chan_pos = self.depth_transform(self.template_pos, chan_ori, self.depth)
         return chan_pos, chan_ori
 
-    
+    @staticmethod
+    def depth_transform(template_pos, template_ori, depth):
+        """
+        Move template positions by the depth measurements along the z-axis of the template orientations.
+
+        Parameters
+        ----------
+        template_pos : np.ndarray
+            Template positions, shape (n_channels, 3).
+        template_ori : np.ndarray
+            Template orientations, shape (n_channels, 3, 3).
+        depth : np.ndarray
+            Depth measurements in mm, shape (n_channels,) or (..., n_channels) to transform several sets
+            of depths at once, for example in simulations.
+
+        Returns
+        -------
+        np.ndarray
+            The transformed positions, shape (..., n_channels, 3).
+        """
+        depth = np.asarray(depth, dtype=float)
+        if depth.shape[-1] != len(template_pos):
+            raise ValueError(f"Got {depth.shape[-1]} depth measurements for {len(template_pos)} channels.")
+
+        updated_depth = (52 - depth) / 1000
+
+        return template_pos + DEPTH_DIRECTION_SIGN * updated_depth[..., np.newaxis] * template_ori[:, 2, :]
+
     def transform_template_depth(self, labels): #len_sleeve:float = 75/1000, offset:float = 13/1000
         template_ori = self.helmet_template.get_chs_ori(labels)
         template_pos = self.helmet_template.get_chs_pos(labels)
-        
-        # Create a new list to store the updated positions
-        transformed_pos = []
-        
+
         # Move template pos by measurement length in template ori direction
-        for pos, ori, depth in zip(template_pos, template_ori, self.depth):
-            updated_depth = (52-depth)/1000
-            x = (pos[0] - (updated_depth* ori[2,0]))
-            y = (pos[1] - (updated_depth* ori[2,1]))
-            z = pos[2] + (updated_depth * ori[2,2])
-
-            transformed_pos.append([x, y, z])
-        
-        return np.array(transformed_pos)
-
-    def get_chs_ori(self, labels: list[str]=None):
-        return self._get_attributes_by_labels(labels, 'chan_ori')
+        return self.depth_transform(template_pos, template_ori, self.depth)
+
+    def update_depth(self, labels: list[str], depth: list[float]):
+        """
+        Update the depth measurements of a subset of channels in place, without querying the helmet template.
+
+        Parameters
+        ----------
+        labels : list[str]
+            The labels of the channels to update.
+        depth : list[float]
+            The new depth measurements in mm, in the same order as labels.
+        """
+        if isinstance(labels, str):
+            labels = [labels]
+
+        indices, missing = self._indices_of_labels(labels)
+        if missing:
+            raise ValueError(f"Labels {missing} not found in the sensor layout.")
+
+        self.depth[indices] = depth
+        self.chan_pos[indices] = self.depth_transform(
+            self.template_pos[indices], self.chan_ori[indices], self.depth[indices]
+        )
+
+    def get_chs_ori(self, labels: list[str]=None, view: bool=False):
+        return self._get_attributes_by_labels(labels, 'chan_ori', view)
     
\ No newline at end of file
@@ -1,9 +1,13 @@
 import numpy as np
 import pickle
+import json
+from functools import cache
 from pathlib import Path
 import pandas as pd
 from .template_base import TemplateBase
 
+TEMPLATE_DIR = Path(__file__).parent / "template"
+
 class HelmetTemplate(TemplateBase):    
     """
     A class representing the template layout of a helmet with positions and orientations of sensor slots.
@@ -40,6 +44,8 @@ class HelmetTemplate(TemplateBase):
     unit : str
         Unit of measurement for position values.
     """
+    label_attributes = {"fid_pos": "fid_label"}
+
     def __init__(self, chan_ori, chan_pos, label, fid_pos, fid_label, unit):
         self.chan_ori = chan_ori
         #self.chan_pos = chan_pos
@@ -50,17 +56,62 @@ class HelmetTemplate(TemplateBase):
         super().__init__(label, unit, chan_pos)
 
 
-    def get_chs_ori(self, labels):
+    def get_chs_ori(self, labels, view=False):
         """
         Retrieve orientations by using the generic get_attributes_by_labels.
         """
-        return self._get_attributes_by_labels(labels, 'chan_ori')
+        return self._get_attributes_by_labels(labels, 'chan_ori', view)
 
-    def get_fid_pos(self, labels):
+    def get_fid_pos(self, labels, view=False):
         """
         Retrieve fiducial positions by using the generic get_attributes_by_labels.
+        Fiducials are looked up by fid_label.
         """
-        return self._get_attributes_by_labels(labels, 'fid_pos')
+        return self._get_attributes_by_labels(labels, 'fid_pos', view)
+
+
+def save_helmet_template(template: HelmetTemplate, outpath: Path):
+    """
+    Save a helmet template as a directory of .npy arrays (chan_pos, chan_ori, fid_pos) and a JSON sidecar
+    with the labels and unit, which can be memory-mapped by load_helmet_template.
+    """
+    outpath = Path(outpath)
+    outpath.mkdir(parents=True, exist_ok=True)
+
+    for attribute in ["chan_pos", "chan_ori", "fid_pos"]:
+        np.save(outpath / f"{attribute}.npy", np.asarray(getattr(template, attribute), dtype=float))
+
+    with (outpath / "labels.json").open("w") as file:
+        json.dump({
+            "label": list(template.label),
+            "fid_label": list(template.fid_label),
+            "unit": template.unit
+        }, file)
+
+
+def load_helmet_template(path: Path, mmap_mode: str = "r"):
+    """
+    Load a helmet template saved with save_helmet_template.
+
+    Parameters
+    ----------
+    path : Path
+        Directory containing the template.
+    mmap_mode : str
+        Passed to np.load. With the default "r" the arrays are memory-mapped read-only, so processes loading
+        the same template share its memory. Use None to load the arrays into memory.
+    """
+    path = Path(path)
+
+    with (path / "labels.json").open() as file:
+        labels = json.load(file)
+
+    arrays = {
+        attribute: np.load(path / f"{attribute}.npy", mmap_mode=mmap_mode)
+        for attribute in ["chan_pos", "chan_ori", "fid_pos"]
+    }
+
+    return HelmetTemplate(label=labels["label"], fid_label=labels["fid_label"], unit=labels["unit"], **arrays)
 
 
 class CustomUnpickler(pickle.Unpickler):
@@ -70,16 +121,27 @@ class CustomUnpickler(pickle.Unpickler):
         return super().find_class(module, name)
 
 
-# Get the absolute path to the current module's directory
-module_dir = Path(__file__).parent
+def convert_pickle_template(pickle_path: Path, outpath: Path):
+    """
+    One-time conversion of a pickled HelmetTemplate to the format of save_helmet_template.
+    Only convert pickles from trusted sources, as unpickling can run arbitrary code.
+    """
+    with Path(pickle_path).open("rb") as file:
+        template = CustomUnpickler(file).load()
+
+    save_helmet_template(template, outpath)
+
 
-# Construct the full path to the template file
-template_path = module_dir / "template" / "FL_alpha1_helmet.pkl"
+@cache
+def _load_packaged_template(name: str):
+    return load_helmet_template(TEMPLATE_DIR / name)
 
-# Open the file and load the pickle object using the custom unpickler
-with template_path.open("rb") as file:
-    FL_alpha1_helmet = CustomUnpickler(file).load()
 
+def __getattr__(name):
+    # packaged templates are loaded on first access rather than when the module is imported
+    if name == "FL_alpha1_helmet":
+        return _load_packaged_template(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def generate_FL_helmet_template():
@@ -88,7 +150,6 @@ def generate_FL_helmet_template():
     Otherwise the remaining functions, e.g. when creating the OPMSensorLayout based on the depth measurements will be wrong
     """
 
-    outpath = Path("OPM_lab") / "sensor_position" / "template"
     df = pd.read_excel("../Alpha 1.2 Helmet Digital File Packet/Alpha 1 Adjustable Helmet Sensor locations.xlsx")
 
     # Create a list to hold the orientation matrices
@@ -152,16 +213,14 @@ def generate_FL_helmet_template():
         fid_pos=fiducial_positions,
         unit="m")
 
-    with open(outpath / "FL_alpha1_helmet.pkl", 'wb') as file:
-        pickle.dump(FL_template, file)
+    save_helmet_template(FL_template, TEMPLATE_DIR / "FL_alpha1_helmet")
     print("new template generated")
 
 
 def generate_FL_helmet_template_old(): # NOW RELYING ON FILE FROM FIELDLINE INSTEAD!!
     import mat73
 
-    outpath = Path(__file__).parents[1] / "sensor_position" / "template"
-    data_dict = mat73.loadmat(outpath / 'fieldlinealpha1.mat')
+    data_dict = mat73.loadmat(TEMPLATE_DIR / 'fieldlinealpha1.mat')
     data = data_dict["fieldlinealpha1"]
 
     FL_template = HelmetTemplate(
@@ -172,8 +231,7 @@ def generate_FL_helmet_template_old(): # NOW RELYING ON FILE FROM FIELDLINE INST
         fid_pos=data["fid"]["pos"],
         unit=data["unit"])
 
-    with open(outpath / "FL_alpha1_helmet.pkl", 'wb') as file:
-        pickle.dump(FL_template, file)
+    save_helmet_template(FL_template, TEMPLATE_DIR / "FL_alpha1_helmet")
 
 
 if __name__ in "__main__":
@@ -0,0 +1,78 @@
+import os
+from functools import lru_cache
+from pathlib import Path
+import numpy as np
+import mne
+
+# the on-disk cache can be moved by setting OPM_LAB_CACHE_DIR
+CACHE_DIR = Path(os.environ.get("OPM_LAB_CACHE_DIR", Path.home() / ".cache" / "OPM_lab")) / "montages"
+
+
+def _cache_path(montage: str):
+    # keyed by MNE version, as the standard montages may change between versions
+    return CACHE_DIR / f"mne-{mne.__version__}" / f"{montage}.npz"
+
+
+def _extract_montage_information(montage: str):
+    mne_montage = mne.channels.make_standard_montage(montage)
+
+    kinds = np.array([digpoint["kind"] for digpoint in mne_montage.dig])
+    positions = np.array([digpoint["r"] for digpoint in mne_montage.dig])
+
+    return positions[kinds == mne.io.constants.FIFF.FIFFV_POINT_EEG], list(mne_montage.ch_names)
+
+
+@lru_cache(maxsize=32)
+def _cached_montage_information(montage: str):
+    path = _cache_path(montage)
+
+    try:
+        with np.load(path) as data:
+            positions, labels = data["chan_pos"], data["label"].tolist()
+    except (OSError, KeyError, ValueError): # not cached yet or unreadable
+        positions, labels = _extract_montage_information(montage)
+
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # write to a temporary file first, so concurrent processes never read a partial file
+            tmp_path = path.with_name(f"{path.stem}.{os.getpid()}.tmp")
+            with tmp_path.open("wb") as file:
+                np.savez(file, chan_pos=positions, label=np.array(labels))
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Could not cache montage {montage} in {path}: {e}")
+
+    positions.flags.writeable = False # shared between all templates using the montage
+    return positions, tuple(labels)
+
+
+def get_montage_information(montage: str):
+    """
+    Get the EEG channel positions and labels of a standard MNE montage.
+
+    The extracted positions are cached in memory (LRU) and on disk, keyed by montage name and MNE version,
+    so only the first call for a montage builds it with mne.channels.make_standard_montage.
+
+    Parameters
+    ----------
+    montage : str
+        Name of the montage, see mne.channels.get_builtin_montages().
+
+    Returns
+    -------
+    tuple
+        Read-only array of positions (n_channels, 3) and a list of labels.
+    """
+    positions, labels = _cached_montage_information(montage)
+    return positions, list(labels)
+
+
+def clear_montage_cache(disk: bool = False):
+    """
+    Clear the in-memory cache, and optionally the on-disk cache for the current MNE version.
+    """
+    _cached_montage_information.cache_clear()
+
+    if disk:
+        for path in _cache_path("").parent.glob("*.npz"):
+            path.unlink()
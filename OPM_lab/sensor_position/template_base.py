@@ -6,13 +6,57 @@ class TemplateBase:
         self.unit = unit
         self.chan_pos = chan_pos
 
-    def _get_attributes_by_labels(self, labels=None, attribute="chan_pos"):
+    # attributes that are indexed by another list of labels than self.label, e.g. {"fid_pos": "fid_label"}
+    label_attributes = {}
+
+    def _label_index(self, label_attribute="label"):
+        """
+        Mapping from label to index, built once per list of labels and rebuilt if the list is replaced.
+
+        Parameters:
+            label_attribute (str): The name of the attribute holding the labels.
+
+        Returns:
+            dict: label -> index
+        """
+        labels = getattr(self, label_attribute)
+        cache = self.__dict__.setdefault("_label_index_cache", {})
+
+        cached = cache.get(label_attribute)
+        if cached is None or cached[0] is not labels:
+            cached = cache[label_attribute] = (labels, {label: idx for idx, label in enumerate(labels)})
+
+        return cached[1]
+
+    def _indices_of_labels(self, labels, label_attribute="label"):
+        """
+        Look up the indices of labels.
+
+        Parameters:
+            labels (list[str]): The labels to look up.
+            label_attribute (str): The name of the attribute holding the labels.
+
+        Returns:
+            tuple: np.array of indices of the labels found, and a list of the labels not found.
+        """
+        label_index = self._label_index(label_attribute)
+
+        indices = [label_index.get(label, -1) for label in labels]
+        missing = [label for label, idx in zip(labels, indices) if idx == -1]
+        if missing:
+            indices = [idx for idx in indices if idx != -1]
+
+        return np.array(indices, dtype=np.intp), missing
+
+    def _get_attributes_by_labels(self, labels=None, attribute="chan_pos", view=False):
         """
         General method to retrieve values of a specified attribute based on labels.
 
         Parameters:
             labels (list[str] or str): A list of labels or a single label to retrieve data for.
             attribute (str): The name of the attribute to retrieve (e.g., 'chan_pos', 'chan_ori').
+            view (bool): If True and the labels select a contiguous, ordered block, a view of the template data is
+                returned instead of a copy. The view must not be modified.
 
         Returns:
             np.array: An array of values for the specified attribute based on the input labels.
@@ -21,25 +65,25 @@ class TemplateBase:
         if isinstance(labels, str):
             labels = [labels]
 
-        if labels is None: # return all labels
-            labels = self.label
-
         # Get the attribute (e.g., self.chan_pos, self.chan_ori)
         attr_values = getattr(self, attribute, None)
         if attr_values is None:
             raise AttributeError(f"Attribute '{attribute}' not found in the template.")
+        attr_values = np.asarray(attr_values)
+
+        if labels is None: # return all labels
+            return attr_values if view else attr_values.copy()
 
         # Retrieve values based on labels
-        values = []
-        for label in labels:
-            if label in self.label:
-                index = self.label.index(label)
-                values.append(attr_values[index])
-            else:
-                print(f"Label '{label}' not found in the template.")
-
-        return np.array(values)
+        indices, missing = self._indices_of_labels(labels, self.label_attributes.get(attribute, "label"))
+        if missing:
+            print(f"Labels {missing} not found in the template.")
+
+        if view and len(indices) > 0 and np.all(np.diff(indices) == 1):
+            return attr_values[indices[0]:indices[-1] + 1]
+
+        return attr_values[indices]
     
-    def get_chs_pos(self, labels: list[str]=None):
-        return self._get_attributes_by_labels(labels, 'chan_pos')
+    def get_chs_pos(self, labels: list[str]=None, view: bool=False):
+        return self._get_attributes_by_labels(labels, 'chan_pos', view)
     
\ No newline at end of file
@@ -0,0 +1,223 @@
+"""
+Robust fitting of the device-to-head transform.
+
+The initial transform from matched OPM sensor positions is refined with RANSAC over the matched points (to reject
+badly digitised sensors), optionally followed by an iterative closest point (ICP) stage against the digitised
+head-shape points.
+
+The sensors do not lie on the scalp, so ICP does not pair the sensors themselves with the head-shape points, but the
+point on the scalp beneath each sensor: the sensor position moved towards the head by the sensor-to-scalp distance
+along the z-axis of the sensor.
+"""
+import numpy as np
+from scipy.spatial import cKDTree
+
+
+def apply_trans(trans: np.ndarray, points: np.ndarray):
+    """
+    Apply a 4x4 transform to points of shape (..., 3).
+    """
+    return points @ trans[:3, :3].T + trans[:3, 3]
+
+
+def outward_normals(positions: np.ndarray, normals: np.ndarray):
+    """
+    Flip normals of shape (n_points, 3) to point away from the centroid of the positions, whatever the sign
+    convention of the sensor orientations.
+    """
+    sign = np.sign(np.sum((positions - positions.mean(axis=0)) * normals, axis=1))
+    sign[sign == 0] = 1
+    normals = normals / np.linalg.norm(normals, axis=1, keepdims=True)
+    return normals * sign[:, np.newaxis]
+
+
+def fit_rigid(source: np.ndarray, target: np.ndarray, weights: np.ndarray = None):
+    """
+    Weighted least-squares rigid transform (rotation and translation) mapping source onto target (Kabsch/Arun).
+
+    Args:
+        source (np.ndarray): Points of shape (..., n_points, 3). Leading dimensions are fitted independently.
+        target (np.ndarray): Points of the same shape as source.
+        weights (np.ndarray): Weight of each point pair, shape (..., n_points). Defaults to equal weights.
+
+    Returns:
+        np.ndarray: The transform(s), shape (..., 4, 4).
+    """
+    if weights is None:
+        weights = np.ones(source.shape[:-1])
+    weights = weights / weights.sum(axis=-1, keepdims=True)
+
+    source_mean = np.einsum("...n,...ni->...i", weights, source)
+    target_mean = np.einsum("...n,...ni->...i", weights, target)
+
+    covariance = np.einsum(
+        "...n,...ni,...nj->...ij", weights, source - source_mean[..., np.newaxis, :], target - target_mean[..., np.newaxis, :]
+    )
+    u, _, vt = np.linalg.svd(covariance)
+
+    # correct for reflections
+    d = np.sign(np.linalg.det(np.swapaxes(vt, -1, -2) @ np.swapaxes(u, -1, -2)))
+    vt[..., 2, :] *= d[..., np.newaxis]
+    rotation = np.swapaxes(vt, -1, -2) @ np.swapaxes(u, -1, -2)
+
+    trans = np.zeros(source.shape[:-2] + (4, 4))
+    trans[..., :3, :3] = rotation
+    trans[..., :3, 3] = target_mean - np.einsum("...ij,...j->...i", rotation, source_mean)
+    trans[..., 3, 3] = 1
+
+    return trans
+
+
+def ransac_matched_points(source: np.ndarray, target: np.ndarray, threshold: float = 0.005, n_iter: int = 500, seed: int = 0):
+    """
+    Fit a rigid transform robustly with RANSAC over matched point pairs. All candidate transforms are fitted
+    in one vectorized pass.
+
+    Args:
+        source (np.ndarray): Points of shape (n_points, 3).
+        target (np.ndarray): Matched points of shape (n_points, 3).
+        threshold (float): Maximum distance between a transformed source point and its target to count as an inlier.
+        n_iter (int): The number of random minimal (3 point) samples.
+        seed (int): Seed for the random number generator, fixed by default so fits are reproducible.
+
+    Returns:
+        tuple: The transform fitted on all inliers and a boolean mask of the inliers.
+    """
+    n_points = len(source)
+    if n_points <= 3:
+        return fit_rigid(source, target), np.ones(n_points, dtype=bool)
+
+    rng = np.random.default_rng(seed)
+    samples = np.argsort(rng.random((n_iter, n_points)), axis=1)[:, :3]
+
+    candidates = fit_rigid(source[samples], target[samples])
+    distances = np.linalg.norm(
+        np.einsum("kij,nj->kni", candidates[:, :3, :3], source) + candidates[:, np.newaxis, :3, 3] - target, axis=-1
+    )
+
+    # most inliers, ties broken by the smallest summed inlier distance
+    inliers = distances < threshold
+    score = inliers.sum(axis=1) - (np.where(inliers, distances, 0).sum(axis=1) / threshold) / (n_points + 1)
+    best_inliers = inliers[np.argmax(score)]
+
+    if best_inliers.sum() < 3: # no consensus, fall back to all points
+        best_inliers = np.ones(n_points, dtype=bool)
+
+    return fit_rigid(source[best_inliers], target[best_inliers]), best_inliers
+
+
+def icp_refine(
+        trans: np.ndarray,
+        sensors_device: np.ndarray,
+        sensors_head: np.ndarray,
+        head_points: np.ndarray,
+        sensor_normals: np.ndarray,
+        scalp_offset,
+        surface_weight: float = 0.5,
+        max_distance: float = 0.02,
+        max_iter: int = 50,
+        tol: float = 1e-7
+        ):
+    """
+    Refine a device-to-head transform with iterative closest point.
+
+    Every iteration, the scalp point beneath each sensor (the sensor moved towards the head by scalp_offset along its
+    normal) is transformed to head space and paired with its closest head-shape point (looked up in a KD-tree). The
+    transform is then refitted on the matched sensor positions together with the closest-point pairs, weighted by
+    surface_weight. Closest-point pairs further apart than max_distance, or than three times their median distance,
+    are treated as outliers.
+
+    Args:
+        trans (np.ndarray): Initial 4x4 device-to-head transform.
+        sensors_device (np.ndarray): Sensor positions in device space, shape (n_sensors, 3).
+        sensors_head (np.ndarray): Digitised sensor positions in head space, shape (n_sensors, 3).
+        head_points (np.ndarray): Digitised head-shape points in head space, shape (n_points, 3).
+        sensor_normals (np.ndarray): The z-axis of each sensor in device space, shape (n_sensors, 3). The sign does
+            not matter, the normals are flipped to point away from the head.
+        scalp_offset (float | np.ndarray): Distance from each sensor position to the scalp along its normal (m), a
+            single value or one per sensor.
+        surface_weight (float): Weight of the closest-point pairs relative to the matched sensor positions.
+        max_distance (float): Maximum distance of a closest-point pair.
+        max_iter (int): Maximum number of iterations.
+        tol (float): Stop when the mean squared change of the transformed sensor positions is below tol.
+
+    Returns:
+        np.ndarray: The refined transform.
+    """
+    tree = cKDTree(head_points)
+    n_sensors = len(sensors_device)
+
+    scalp_offset = np.broadcast_to(np.asarray(scalp_offset, dtype=float), (n_sensors,))
+    scalp_device = sensors_device - scalp_offset[:, np.newaxis] * outward_normals(sensors_device, sensor_normals)
+
+    previous = apply_trans(trans, sensors_device)
+    for _ in range(max_iter):
+        distances, nearest = tree.query(apply_trans(trans, scalp_device), distance_upper_bound=max_distance)
+
+        valid = np.isfinite(distances)
+        if valid.any():
+            valid &= distances <= 3 * np.median(distances[valid]) + 1e-12
+
+        source = np.concatenate([sensors_device, scalp_device[valid]])
+        target = np.concatenate([sensors_head, head_points[nearest[valid]]])
+        weights = np.concatenate([np.ones(n_sensors), np.full(valid.sum(), surface_weight)])
+
+        trans = fit_rigid(source, target, weights)
+
+        current = apply_trans(trans, sensors_device)
+        change = np.mean(np.sum((current - previous) ** 2, axis=1))
+        previous = current
+        if change < tol:
+            break
+
+    return trans
+
+
+def fit_device_to_head(
+        sensors_device: np.ndarray,
+        sensors_head: np.ndarray,
+        head_points: np.ndarray = None,
+        ransac_threshold: float = 0.005,
+        sensor_normals: np.ndarray = None,
+        scalp_offset=None,
+        **icp_kwargs
+        ):
+    """
+    Robustly fit the device-to-head transform: RANSAC over the matched sensor positions, followed by ICP
+    against the head-shape points if any are given together with the sensor normals and the sensor-to-scalp distance.
+    Without a known sensor-to-scalp distance the head-shape points are only used for the surface residuals, as
+    pairing the sensors directly with the scalp would pull them onto it.
+
+    Args:
+        sensors_device (np.ndarray): Sensor positions in device space (m), shape (n_sensors, 3).
+        sensors_head (np.ndarray): Digitised sensor positions in head space (m), shape (n_sensors, 3).
+        head_points (np.ndarray): Digitised head-shape points in head space (m), shape (n_points, 3).
+        ransac_threshold (float): Inlier threshold of the RANSAC stage (m).
+        sensor_normals (np.ndarray): The z-axis of each sensor in device space, shape (n_sensors, 3).
+        scalp_offset (float | np.ndarray): Distance from each sensor position to the scalp along its normal (m), a
+            single value or one per sensor.
+        **icp_kwargs: Passed to icp_refine.
+
+    Returns:
+        tuple: The 4x4 transform, a boolean mask of the sensors used (RANSAC inliers), the distance between each
+        transformed sensor and its digitised position, and the distance between each transformed sensor and the
+        closest head-shape point (NaN without head-shape points).
+    """
+    trans, inliers = ransac_matched_points(sensors_device, sensors_head, threshold=ransac_threshold)
+
+    transformed = apply_trans(trans, sensors_device)
+    surface_residuals = np.full(len(sensors_device), np.nan)
+
+    if head_points is not None and len(head_points) > 0:
+        if sensor_normals is not None and scalp_offset is not None:
+            scalp_offset = np.broadcast_to(np.asarray(scalp_offset, dtype=float), (len(sensors_device),))
+            trans = icp_refine(
+                trans, sensors_device[inliers], sensors_head[inliers], head_points,
+                sensor_normals[inliers], scalp_offset[inliers], **icp_kwargs
+            )
+            transformed = apply_trans(trans, sensors_device)
+        surface_residuals = cKDTree(head_points).query(transformed)[0]
+
+    residuals = np.linalg.norm(transformed - sensors_head, axis=1)
+
+    return trans, inliers, residuals, surface_residuals
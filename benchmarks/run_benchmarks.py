@@ -0,0 +1,320 @@
+"""
+Benchmarks of the numeric hot paths of OPM_lab on synthetic data, compared against a stored baseline.
+
+Usage:
+    python benchmarks/run_benchmarks.py                  # run and compare against benchmarks/baseline.json
+    python benchmarks/run_benchmarks.py --save-baseline  # run and store the results as the new baseline
+    python benchmarks/run_benchmarks.py -k layout        # only run the benchmarks with "layout" in their name
+
+The time of a benchmark is the median per-call time over several repeats. Every run also times a fixed calibration
+loop, and the baseline stores the time of every benchmark relative to it, so the baseline in the repository can be
+compared against on other machines, and a machine that is uniformly faster or slower does not show up as a
+regression. A benchmark more than --threshold times slower than its baseline is reported as a regression and makes
+the script exit with status 1. The baseline column shows the baseline scaled to the calibration of the current run.
+"""
+
+# for local imports
+import sys
+from pathlib import Path
+
+# make sure to append path to OPM_lab
+current_file = Path(__file__).resolve()
+parent_directory = current_file.parent.parent
+sys.path.append(str(parent_directory))
+
+import argparse
+import json
+import platform
+import timeit
+import numpy as np
+import pandas as pd
+import mne
+from OPM_lab.digitise import FastrakConnector, Digitiser, AudioFeedback, FastrakEmulator
+from OPM_lab.sensor_position import HelmetTemplate, OPMSensorLayout
+from OPM_lab.mne_integration import add_sensor_layout, add_device_to_head
+
+BASELINE_PATH = current_file.parent / "baseline.json"
+N_CHANNELS = 300
+N_POINTS = 5000
+
+BENCHMARKS = {}
+
+
+def benchmark(setup):
+    """
+    Register a benchmark. setup() prepares the synthetic data and returns the function to time.
+    """
+    BENCHMARKS[setup.__name__] = setup
+    return setup
+
+
+def synthetic_helmet(n_channels: int = N_CHANNELS, seed: int = 0):
+    rng = np.random.default_rng(seed)
+
+    # slots on the upper half of a sphere, each with a random orthonormal orientation
+    direction = rng.normal(size=(n_channels, 3))
+    direction[:, 2] = np.abs(direction[:, 2])
+    chan_pos = 0.1 * direction / np.linalg.norm(direction, axis=1, keepdims=True)
+    chan_ori = np.linalg.qr(rng.normal(size=(n_channels, 3, 3)))[0]
+
+    return HelmetTemplate(
+        chan_ori=chan_ori,
+        chan_pos=chan_pos,
+        label=[f"FL{idx + 1}" for idx in range(n_channels)],
+        fid_pos=chan_pos[:3].copy(),
+        fid_label=["nasion", "lpa", "rpa"],
+        unit="m",
+    )
+
+
+def synthetic_layout(n_channels: int = N_CHANNELS):
+    helmet = synthetic_helmet(n_channels)
+    return OPMSensorLayout(label=list(helmet.label), depth=np.full(n_channels, 40.), helmet_template=helmet)
+
+
+def synthetic_raw(labels: list[str]):
+    info = mne.create_info(labels, sfreq=1000., ch_types="mag")
+    return mne.io.RawArray(np.zeros((len(labels), 10)), info, verbose=False)
+
+
+@benchmark
+def ftformat():
+    record = "01 " + "".join(f"{value:7.2f}" for value in [12.34, -5.67, 8.9, 123.45, -67.89, 1.23])
+    return lambda: FastrakConnector.ftformat(record)
+
+
+def synthetic_frame(output_format: str):
+    emulator = FastrakEmulator(n_receivers=2)
+    emulator.metric = True
+    emulator.binary = output_format == "binary"
+    return emulator.format_frame(emulator.pose(1.)[:2])
+
+
+@benchmark
+def decode_frame_ascii():
+    records = synthetic_frame("ascii").splitlines()
+    return lambda: FastrakConnector.decode_frame(records, "ascii")
+
+
+@benchmark
+def decode_frame_binary():
+    data = synthetic_frame("binary")
+    return lambda: FastrakConnector.decode_frame(data, "binary")
+
+
+@benchmark
+def rotate_and_translate():
+    return lambda: FastrakConnector.rotate_and_translate(20., 0., 10., 30., -10., 5., 5., 5., 5.)
+
+
+@benchmark
+def rotate_and_translate_batch_frame():
+    # one frame of four receivers, as transformed by get_positions_relative_to_head_receiver
+    rng = np.random.default_rng(0)
+    ref_pos, ref_ori, raw_pos = rng.normal(size=(1, 3)), 90 * rng.normal(size=(1, 3)), rng.normal(size=(1, 3, 3))
+    return lambda: FastrakConnector.rotate_and_translate_batch(ref_pos, ref_ori, raw_pos)
+
+
+@benchmark
+def rotate_and_translate_batch_5k_points():
+    rng = np.random.default_rng(0)
+    ref_pos, ref_ori = rng.normal(size=(N_POINTS, 3)), 90 * rng.normal(size=(N_POINTS, 3))
+    raw_pos = rng.normal(size=(N_POINTS, 3))
+    return lambda: FastrakConnector.rotate_and_translate_batch(ref_pos, ref_ori, raw_pos)
+
+
+@benchmark
+def get_attributes_by_labels():
+    helmet = synthetic_helmet()
+    labels = list(np.random.default_rng(0).choice(helmet.label, size=100, replace=False))
+    return lambda: helmet._get_attributes_by_labels(labels, "chan_pos")
+
+
+@benchmark
+def transform_template_depth():
+    layout = synthetic_layout()
+    labels = list(layout.label)
+    return lambda: layout.transform_template_depth(labels)
+
+
+@benchmark
+def add_sensor_layout_300_channels():
+    layout = synthetic_layout()
+    raw = synthetic_raw(list(layout.label))
+    return lambda: add_sensor_layout(raw, layout)
+
+
+@benchmark
+def add_device_to_head_300_channels():
+    layout = synthetic_layout()
+    raw = synthetic_raw(list(layout.label))
+    add_sensor_layout(raw, layout)
+
+    # digitised positions (cm) of the sensors, moved by a known rigid transform
+    angle = np.deg2rad(10)
+    rotation = np.array([[np.cos(angle), -np.sin(angle), 0], [np.sin(angle), np.cos(angle), 0], [0, 0, 1]])
+    positions = 100 * (np.asarray(layout.chan_pos) @ rotation.T + [0.01, -0.02, 0.04])
+    digitised_points = pd.DataFrame({
+        "category": "OPM",
+        "label": layout.label,
+        "x": positions[:, 0],
+        "y": positions[:, 1],
+        "z": positions[:, 2],
+    })
+
+    return lambda: add_device_to_head(raw, digitised_points, unit="cm")
+
+
+@benchmark
+def update_digitised_data_5k_points():
+    positions = np.random.default_rng(0).normal(size=(N_POINTS, 3))
+    audio = AudioFeedback(backend="silent")
+
+    def digitise():
+        digitiser = Digitiser(connector=None, digitisation_scheme=[], audio=audio)
+        for position in positions:
+            digitiser.update_digitised_data("head", "head", position)
+
+    return digitise
+
+
+def calibration_loop():
+    """
+    Fixed mix of interpreter and small numpy operations, like the benchmarks, to normalise their times against.
+    """
+    values = np.arange(64.)
+    total = 0.
+    for i in range(256):
+        total += float(values[i % 64]) * 1.5
+    return total + np.dot(values, values)
+
+
+def time_call(function, repeat: int = 9):
+    """
+    Returns:
+        float: The median time per call in seconds over repeat runs.
+    """
+    timer = timeit.Timer(function)
+    number, _ = timer.autorange()
+    return float(np.median(timer.repeat(repeat=repeat, number=number))) / number
+
+
+def run_benchmarks(pattern: str = None, repeat: int = 9, names: list[str] = None):
+    """
+    Args:
+        pattern (str): Only run the benchmarks containing this string.
+        repeat (int): Number of repeats per benchmark.
+        names (list[str]): Only run these benchmarks.
+
+    Returns:
+        dict: For every benchmark, the time per call ("seconds") and the time of the calibration loop ("calibration").
+        The calibration loop is timed between the benchmarks, and the median over the whole run is used.
+    """
+    results, calibration = {}, [time_call(calibration_loop, repeat)]
+    for name, setup in BENCHMARKS.items():
+        if (pattern is not None and pattern not in name) or (names is not None and name not in names):
+            continue
+        results[name] = {"seconds": time_call(setup(), repeat)}
+        calibration.append(time_call(calibration_loop, repeat))
+        print(f"{name:<40} {format_time(results[name]['seconds']):>10}")
+
+    for result in results.values():
+        result["calibration"] = float(np.median(calibration))
+    return results
+
+
+def format_time(seconds: float):
+    for unit, scale in [("s", 1), ("ms", 1e-3), ("us", 1e-6)]:
+        if seconds >= scale:
+            return f"{seconds / scale:.2f} {unit}"
+    return f"{seconds / 1e-9:.0f} ns"
+
+
+def relative_time(result: dict):
+    """
+    The time of a benchmark in units of the calibration loop, as stored in the baseline.
+    """
+    return result["seconds"] / result["calibration"]
+
+
+def compare(results: dict, baseline: dict, threshold: float):
+    """
+    Print a comparison of the results with the baseline of relative times.
+
+    Returns:
+        list[str]: The names of the benchmarks that regressed.
+    """
+    regressions = []
+    print(f"\n{'benchmark':<40} {'baseline':>10} {'current':>10} {'ratio':>7}")
+    for name, result in results.items():
+        if name not in baseline:
+            print(f"{name:<40} {'-':>10} {format_time(result['seconds']):>10} {'new':>7}")
+            continue
+
+        ratio = relative_time(result) / baseline[name]
+        status = ""
+        if ratio > threshold:
+            status = "  REGRESSION"
+            regressions.append(name)
+        elif ratio < 1 / threshold:
+            status = "  faster"
+        print(
+            f"{name:<40} {format_time(baseline[name] * result['calibration']):>10} {format_time(result['seconds']):>10} "
+            f"{ratio:>6.2f}x{status}"
+        )
+
+    return regressions
+
+
+def main(argv: list[str] = None):
+    parser = argparse.ArgumentParser(description="Benchmark the numeric hot paths of OPM_lab.")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH, help="JSON file with the baseline results.")
+    parser.add_argument("--save-baseline", action="store_true", help="Store the results as the new baseline.")
+    parser.add_argument("--threshold", type=float, default=1.5, help="Slowdown ratio reported as a regression.")
+    parser.add_argument("--repeat", type=int, default=9, help="Number of repeats per benchmark.")
+    parser.add_argument("-k", dest="pattern", help="Only run the benchmarks containing this string.")
+    args = parser.parse_args(argv)
+
+    if not args.save_baseline and not args.baseline.exists():
+        parser.error(f"No baseline at {args.baseline}, run with --save-baseline to create one.")
+
+    results = run_benchmarks(args.pattern, args.repeat)
+
+    if args.save_baseline:
+        baseline = {"results": {}}
+        if args.baseline.exists():
+            baseline = json.loads(args.baseline.read_text())
+        baseline["results"].update({name: relative_time(result) for name, result in results.items()})
+        baseline["machine"] = {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "mne": mne.__version__,
+            "platform": platform.platform(),
+            "processor": platform.processor(),
+        }
+        args.baseline.write_text(json.dumps(baseline, indent=4) + "\n")
+        print(f"\nBaseline saved to {args.baseline}")
+        return 0
+
+    baseline = json.loads(args.baseline.read_text())["results"]
+
+    # a single slow run is often noise from other processes, so only report slowdowns that a second run confirms
+    suspects = [
+        name for name, result in results.items()
+        if name in baseline and relative_time(result) / baseline[name] > args.threshold
+    ]
+    if suspects:
+        print(f"\nRe-timing {len(suspects)} possible regression(s)")
+        for name, result in run_benchmarks(repeat=args.repeat, names=suspects).items():
+            results[name] = min(results[name], result, key=relative_time)
+
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s): {', '.join(regressions)}")
+        return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
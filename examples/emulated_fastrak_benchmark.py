@@ -0,0 +1,40 @@
+"""
+Streams from an emulated FASTRAK (no hardware needed) and reports the effective sample rate and CPU use
+of the acquisition, for both the ASCII and the binary output format.
+"""
+
+# for local imports
+import sys
+import time
+from pathlib import Path
+
+# make sure to append path to OPM_lab
+current_file = Path(__file__).resolve()
+parent_directory = current_file.parent.parent
+sys.path.append(str(parent_directory))
+from OPM_lab.digitise import FastrakConnector, FastrakEmulator
+
+
+def benchmark(output_format: str, rate: float = 120., duration: float = 5.):
+    with FastrakEmulator(rate=rate) as emulator:
+        connector = FastrakConnector(usb_port=emulator.port, output_format=output_format)
+        connector.prepare_for_digitisation()
+
+        stream = connector.start_streaming()
+        cpu_start, wall_start = time.process_time(), time.perf_counter()
+        time.sleep(duration)
+        connector.stop_streaming()
+        cpu, wall = time.process_time() - cpu_start, time.perf_counter() - wall_start
+
+    timestamps = stream.frames_since(0)[0]
+    effective_rate = (len(timestamps) - 1) / (timestamps[-1] - timestamps[0])
+
+    print(
+        f"{output_format:>6}: {stream.count} frames, {effective_rate:.1f} Hz effective rate, "
+        f"{100 * cpu / wall:.1f} % CPU, {emulator.frames_dropped} frames dropped"
+    )
+
+
+if __name__ == "__main__":
+    for output_format in ["ascii", "binary"]:
+        benchmark(output_format)
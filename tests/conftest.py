@@ -0,0 +1,8 @@
+# for local imports
+import sys
+from pathlib import Path
+
+# make sure to append path to OPM_lab
+current_file = Path(__file__).resolve()
+parent_directory = current_file.parent.parent
+sys.path.append(str(parent_directory))
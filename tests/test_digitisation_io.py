@@ -0,0 +1,99 @@
+"""
+Round-trip tests of saving and loading digitisations, and of splitting them into DigitisedPoints.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from OPM_lab.digitise import DigitisedPoints, load_digitisation, read_digitisation, save_digitisation
+
+# engines needed by the formats that are not part of requirements.txt
+ENGINES = {".parquet": "pyarrow", ".h5": "tables"}
+
+
+def digitisation():
+    """
+    A small digitisation in cm, as written by the Digitiser.
+    """
+    rows = [
+        ("fiducials", "lpa", -7., 0., 0.),
+        ("fiducials", "nasion", 0., 9., 0.),
+        ("fiducials", "rpa", 7., 0., 0.),
+        ("OPM", "FL01", 1., 2., 10.),
+        ("OPM", "FL02", -1., 2., 10.5),
+        ("EEG", "Cz", 0., 0., 9.),
+        ("head", "head", 3.25, -4.5, 6.125),
+        ("head", "head", -3.25, 4.5, 6.),
+    ]
+    return pd.DataFrame(rows, columns=["category", "label", "x", "y", "z"])
+
+
+@pytest.mark.parametrize("suffix", [".csv", ".npz", ".parquet", ".h5"])
+def test_round_trip(tmp_path, suffix):
+    if suffix in ENGINES:
+        pytest.importorskip(ENGINES[suffix])
+
+    df = digitisation()
+    path = tmp_path / f"digitisation{suffix}"
+    save_digitisation(df, path)
+    loaded = read_digitisation(path)
+
+    assert list(loaded.columns) == ["category", "label", "x", "y", "z"]
+    assert loaded["category"].dtype == "category" and loaded["label"].dtype == "category"
+    assert list(loaded["category"].astype(str)) == list(df["category"])
+    assert list(loaded["label"].astype(str)) == list(df["label"])
+    np.testing.assert_array_equal(loaded[["x", "y", "z"]].to_numpy(), df[["x", "y", "z"]].to_numpy())
+
+
+@pytest.mark.parametrize("suffix", [".csv", ".npz"])
+def test_load_digitisation(tmp_path, suffix):
+    path = tmp_path / f"digitisation{suffix}"
+    save_digitisation(digitisation(), path)
+
+    points = load_digitisation(path)
+
+    np.testing.assert_allclose(points.fiducials["nasion"], [0, 0.09, 0])
+    np.testing.assert_allclose(points.hsp, [[0.0325, -0.045, 0.06125], [-0.0325, 0.045, 0.06]])
+    assert points.opm_labels == ["FL01", "FL02"]
+    np.testing.assert_allclose(points.opm_pos[1], [-0.01, 0.02, 0.105])
+    assert points.eeg_labels == ["Cz"]
+
+
+def test_invalid_suffix(tmp_path):
+    with pytest.raises(ValueError):
+        save_digitisation(digitisation(), tmp_path / "digitisation.txt")
+    with pytest.raises(ValueError):
+        read_digitisation(tmp_path / "digitisation.txt")
+
+
+def test_from_dataframe_fiducials():
+    df = digitisation()
+    # the nasion digitised again, the last digitisation counts; no rpa
+    df.loc[len(df)] = ["fiducials", "nasion", 0., 9.5, 0.]
+    df = df[df["label"] != "rpa"]
+
+    points = DigitisedPoints.from_dataframe(df, unit="cm")
+
+    np.testing.assert_allclose(points.fiducials["nasion"], [0, 0.095, 0])
+    np.testing.assert_allclose(points.fiducials["lpa"], [-0.07, 0, 0])
+    assert points.fiducials["rpa"] is None
+
+
+@pytest.mark.parametrize("unit, scale", [("m", 1), ("cm", 0.01), ("mm", 0.001)])
+def test_from_dataframe_units(unit, scale):
+    points = DigitisedPoints.from_dataframe(digitisation(), unit=unit)
+    np.testing.assert_allclose(points.eeg_pos, [[0, 0, 9 * scale]])
+
+
+def test_from_dataframe_sensor_type():
+    df = digitisation()
+    # OPM sensors digitised in a step of their own category, marked by the sensor_type column
+    df["category"] = df["category"].replace("OPM", "helmet")
+    df["sensor_type"] = np.where(df["category"] == "helmet", "OPM", "")
+
+    points = DigitisedPoints.from_dataframe(df, unit="cm")
+    assert points.opm_labels == ["FL01", "FL02"]
+
+    # without the sensor_type column, the OPM sensors are taken from the category column
+    assert DigitisedPoints.from_dataframe(df.drop(columns="sensor_type"), unit="cm").opm_labels == []
+    assert DigitisedPoints.from_dataframe(digitisation(), unit="cm").opm_labels == ["FL01", "FL02"]
@@ -0,0 +1,194 @@
+"""
+Regression tests of FastrakConnector and the Digitiser against the FASTRAK emulator, no hardware needed.
+"""
+import asyncio
+import os
+import time
+import numpy as np
+import pytest
+
+pytest.importorskip("termios", reason="the emulator needs a POSIX pseudo-terminal")
+
+from OPM_lab.digitise import AsyncFastrakConnector, FastrakConnector, FastrakEmulator, HeadlessDigitiser, AudioFeedback
+from OPM_lab.digitise.emulator import default_trajectory
+
+# stylus circling the head reference with a radius of 10 cm, see default_trajectory
+STYLUS_RADIUS = 10.
+
+
+def prepared_connector(emulator, **kwargs):
+    connector = FastrakConnector(usb_port=emulator.port, **kwargs)
+    connector.prepare_for_digitisation()
+    return connector
+
+
+@pytest.mark.parametrize("n_receivers", [2, 4])
+def test_prepare_for_digitisation(n_receivers):
+    with FastrakEmulator(n_receivers=n_receivers, press_interval=0.02) as emulator:
+        connector = prepared_connector(emulator)
+        assert connector.n_receivers == n_receivers
+        assert emulator.metric and not emulator.continuous
+
+
+def test_too_few_receivers():
+    with FastrakEmulator(n_receivers=1) as emulator:
+        with pytest.raises(ValueError):
+            prepared_connector(emulator)
+
+
+@pytest.mark.parametrize("output_format", ["ascii", "binary"])
+def test_single_read(output_format):
+    with FastrakEmulator() as emulator:
+        connector = prepared_connector(emulator, output_format=output_format)
+
+        with pytest.raises(TimeoutError): # no press, no frame
+            connector.read_sensor_data(timeout=0.1)
+
+        emulator.press()
+        sensor_data, position = connector.get_position_relative_to_head_receiver(timeout=1)
+
+    assert sensor_data.shape == (7, 2)
+    np.testing.assert_array_equal(sensor_data[0], [1, 2])
+    np.testing.assert_allclose(np.linalg.norm(position), STYLUS_RADIUS, atol=0.02)
+    np.testing.assert_allclose(position[2], 0, atol=0.02)
+
+
+def test_scripted_presses():
+    with FastrakEmulator(press_interval=0.02) as emulator:
+        connector = prepared_connector(emulator)
+        emulator.begin_script()
+
+        for _ in range(5):
+            connector.read_sensor_data(timeout=1)
+
+
+@pytest.mark.parametrize("output_format", ["ascii", "binary"])
+def test_continuous_streaming(output_format):
+    with FastrakEmulator(rate=120.) as emulator:
+        connector = prepared_connector(emulator, output_format=output_format)
+
+        stream = connector.start_streaming()
+        time.sleep(0.5)
+        assert connector.streaming
+        connector.stop_streaming()
+
+    timestamps, sensor_data, positions, _, _ = stream.frames_since(0)
+    assert len(timestamps) > 20
+    assert np.all(np.diff(timestamps) > 0)
+    np.testing.assert_allclose(np.linalg.norm(positions, axis=1), STYLUS_RADIUS, atol=0.02)
+
+
+def test_binary_ascii_equivalence():
+    pose = np.array([[[12.5, -3.25, 8.75, 30., -15., 5.], [20., 1.5, 10., 45., 10., -20.]]])
+
+    sensor_data = {}
+    with FastrakEmulator(trajectory=pose) as emulator:
+        for output_format in ["ascii", "binary"]:
+            connector = prepared_connector(emulator, output_format=output_format)
+            emulator.press()
+            sensor_data[output_format], _ = connector.get_position_relative_to_head_receiver(timeout=1)
+            connector.serialobj.close()
+
+    np.testing.assert_allclose(sensor_data["binary"][1:].T, pose[0], atol=1e-4)
+    np.testing.assert_allclose(sensor_data["ascii"], sensor_data["binary"], atol=0.006)
+
+
+@pytest.mark.parametrize("output_format", ["ascii", "binary"])
+def test_stream_realigns_after_stray_bytes(output_format):
+    with FastrakEmulator() as emulator:
+        connector = prepared_connector(emulator, output_format=output_format)
+        stream = connector.start_streaming()
+
+        time.sleep(0.2)
+        os.write(emulator._master, b"x") # a stray byte on the line
+        time.sleep(0.2)
+        count = stream.count
+        time.sleep(0.2)
+
+        assert connector.streaming
+        assert stream.count > count
+        connector.stop_streaming()
+
+    positions = stream.frames_since(0)[2]
+    np.testing.assert_allclose(np.linalg.norm(positions, axis=1), STYLUS_RADIUS, atol=0.02)
+
+
+@pytest.mark.parametrize("output_format", ["ascii", "binary"])
+def test_async_frames_stop_continuous_output(output_format):
+    async def read_frames(emulator):
+        async with AsyncFastrakConnector(emulator.port, output_format=output_format) as connector:
+            await connector.prepare_for_digitisation()
+            async for sensor_data, position in connector.frames():
+                break
+        return sensor_data, position
+
+    with FastrakEmulator(rate=120.) as emulator:
+        sensor_data, position = asyncio.run(read_frames(emulator))
+        time.sleep(0.1)
+        assert not emulator.continuous
+
+    assert sensor_data.shape == (7, 2)
+    np.testing.assert_allclose(np.linalg.norm(position), STYLUS_RADIUS, atol=0.02)
+
+
+def test_async_read_fails_when_device_disconnects():
+    async def read_until_disconnected(emulator):
+        connector = AsyncFastrakConnector(emulator.port)
+        await connector.prepare_for_digitisation()
+        asyncio.get_running_loop().call_later(0.1, emulator.stop)
+
+        start = time.perf_counter()
+        with pytest.raises(RuntimeError):
+            await connector.read_sensor_data(timeout=2)
+        with pytest.raises(RuntimeError): # without waiting again
+            await connector.read_sensor_data(timeout=2)
+        connector.close()
+        return time.perf_counter() - start
+
+    emulator = FastrakEmulator().start()
+    assert asyncio.run(read_until_disconnected(emulator)) < 1
+
+
+def idle_second_stylus(t: float):
+    """
+    Stylus circling the head reference, and a second stylus lying still 5 cm from it.
+    """
+    pose = default_trajectory(t)[:3]
+    pose[2] = [20, 5, 10, 0, 0, 0]
+    return pose
+
+
+@pytest.mark.parametrize("continuous_output", [True, False])
+def test_idle_stylus_records_no_points(continuous_output):
+    with FastrakEmulator(n_receivers=3, trajectory=idle_second_stylus, press_interval=0.02) as emulator:
+        connector = FastrakConnector(usb_port=emulator.port, styluses=[0, 2], head_reference=1)
+        connector.prepare_for_digitisation()
+        emulator.begin_script()
+
+        digitiser = HeadlessDigitiser(connector, digitisation_scheme=[], audio=AudioFeedback(backend="silent"))
+        digitiser.add("head", n_points=20, dig_type="continuous", continuous_output=continuous_output)
+        digitiser.run_digitisation()
+
+    distances = np.linalg.norm(digitiser.digitised_points[["x", "y", "z"]].to_numpy(), axis=1)
+    np.testing.assert_allclose(distances, STYLUS_RADIUS, atol=0.02)
+
+
+def test_headless_digitiser(tmp_path):
+    with FastrakEmulator(press_interval=0.02) as emulator:
+        connector = prepared_connector(emulator)
+        emulator.begin_script()
+
+        digitiser = HeadlessDigitiser(
+            connector, digitisation_scheme=[], audio=AudioFeedback(backend="silent"), journal_path=tmp_path / "journal"
+        )
+        digitiser.add("fiducials", labels=["lpa", "nasion", "rpa"])
+        digitiser.add("head", n_points=20, dig_type="continuous", continuous_output=True, min_distance=0.5)
+        digitiser.run_digitisation()
+        digitiser.close_journal()
+
+    points = digitiser.digitised_points
+    assert list(points["label"][:3]) == ["lpa", "nasion", "rpa"]
+    assert (points["category"] == "head").sum() == 20
+
+    distances = np.linalg.norm(points[["x", "y", "z"]].to_numpy(), axis=1)
+    np.testing.assert_allclose(distances, STYLUS_RADIUS, atol=0.02)
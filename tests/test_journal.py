@@ -0,0 +1,111 @@
+"""
+Tests of the digitisation journal: replay, undo, recovery from a crash while writing and resuming a session.
+"""
+import numpy as np
+import pytest
+
+from OPM_lab.digitise import AudioFeedback, DigitisationJournal, HeadlessDigitiser
+
+
+def journaled_session(path):
+    with DigitisationJournal(path) as journal:
+        journal.append("fiducials", "lpa", (-7., 0., 0.))
+        journal.append("fiducials", "nasion", (0., 9., 0.))
+        journal.append("fiducials", "rpa", (7., 0., 0.))
+        journal.append("head", "head", (1., 2., 3.))
+        journal.append("head", "head", (9., 9., 9.))
+        journal.undo()
+        journal.append("head", "head", (4., 5., 6.))
+
+
+def headless_digitiser(path, connector=None):
+    digitiser = HeadlessDigitiser(
+        connector, digitisation_scheme=[], audio=AudioFeedback(backend="silent"), journal_path=path
+    )
+    digitiser.add("fiducials", labels=["lpa", "nasion", "rpa"])
+    digitiser.add("head", n_points=5, dig_type="continuous", continuous_output=True, min_distance=0.5)
+    return digitiser
+
+
+def test_replay_with_undo(tmp_path):
+    path = tmp_path / "session.journal"
+    journaled_session(path)
+
+    points = DigitisationJournal.replay(path).to_dataframe()
+
+    assert list(points["label"]) == ["lpa", "nasion", "rpa", "head", "head"]
+    np.testing.assert_array_equal(points[["x", "y", "z"]].to_numpy()[3:], [[1, 2, 3], [4, 5, 6]])
+
+
+def test_truncated_last_line(tmp_path):
+    path = tmp_path / "session.journal"
+    journaled_session(path)
+    with path.open("a", encoding="utf-8") as file:
+        file.write("A\thead\thead\t7.0\t8.") # crash while writing
+
+    assert len(DigitisationJournal.replay(path)) == 5
+
+    # reopening drops the incomplete line, so the next point starts on a line of its own
+    with DigitisationJournal(path) as journal:
+        journal.append("head", "head", (7., 8., 9.))
+
+    points = DigitisationJournal.replay(path)
+    assert len(points) == 6
+    np.testing.assert_array_equal(points.xyz[-1], [7, 8, 9])
+
+
+def test_invalid_label_is_not_kept(tmp_path):
+    path = tmp_path / "session.journal"
+    digitiser = HeadlessDigitiser(None, digitisation_scheme=[], audio=AudioFeedback(backend="silent"), journal_path=path)
+
+    with pytest.raises(ValueError):
+        digitiser.update_digitised_data("OPM", "FL\t01", (1., 2., 3.))
+    with pytest.raises(ValueError):
+        digitiser.add("OPM", labels=["FL01", "FL\n02"])
+    digitiser.close_journal()
+
+    assert len(digitiser.points) == 0
+    assert len(DigitisationJournal.replay(path)) == 0
+
+
+def test_completed_steps(tmp_path):
+    path = tmp_path / "session.journal"
+    journaled_session(path)
+
+    digitiser = headless_digitiser(path)
+    assert len(digitiser.points) == 5
+    assert digitiser.completed_steps() == [(0, 3), (3, 2)]
+    digitiser.close_journal()
+
+    # a journal that does not match the digitisation scheme
+    digitiser = HeadlessDigitiser(None, digitisation_scheme=[], audio=AudioFeedback(backend="silent"), journal_path=path)
+    digitiser.add("head", n_points=5, dig_type="continuous")
+    with pytest.raises(ValueError):
+        digitiser.completed_steps()
+    digitiser.close_journal()
+
+
+def test_resume_after_crash(tmp_path):
+    pytest.importorskip("termios", reason="the emulator needs a POSIX pseudo-terminal")
+    from OPM_lab.digitise import FastrakConnector, FastrakEmulator
+
+    path = tmp_path / "session.journal"
+    journaled_session(path)
+    with path.open("a", encoding="utf-8") as file:
+        file.write("A\thead") # crash while writing
+
+    with FastrakEmulator(rate=120.) as emulator:
+        connector = FastrakConnector(usb_port=emulator.port)
+        connector.prepare_for_digitisation()
+
+        digitiser = headless_digitiser(path, connector)
+        digitiser.run_digitisation() # only the three remaining head points are digitised
+        digitiser.close_journal()
+
+    points = digitiser.digitised_points
+    assert list(points["category"]) == ["fiducials"] * 3 + ["head"] * 5
+    np.testing.assert_array_equal(points[["x", "y", "z"]].to_numpy()[3:5], [[1, 2, 3], [4, 5, 6]])
+
+    # the journal holds the whole session
+    replayed = DigitisationJournal.replay(path)
+    np.testing.assert_array_equal(replayed.xyz, points[["x", "y", "z"]].to_numpy())
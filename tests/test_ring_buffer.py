@@ -0,0 +1,56 @@
+"""
+Tests of the frame ring buffer the connector streams into.
+"""
+import numpy as np
+import pytest
+
+from OPM_lab.digitise import FrameRingBuffer
+
+
+def append_frames(buffer, start: int, stop: int):
+    for frame in range(start, stop):
+        buffer.append(float(frame), np.full((7, buffer.n_receivers), frame), np.full(3, frame))
+
+
+def test_frames_since():
+    buffer = FrameRingBuffer(capacity=8, n_receivers=2)
+    append_frames(buffer, 0, 5)
+
+    timestamps, sensor_data, positions, cursor, n_overwritten = buffer.frames_since(2)
+
+    np.testing.assert_array_equal(timestamps, [2, 3, 4])
+    np.testing.assert_array_equal(sensor_data[:, 0, 0], [2, 3, 4])
+    assert cursor == 5 and n_overwritten == 0
+
+
+@pytest.mark.parametrize("n_frames", [8, 20])
+def test_overrun_view_survives_next_frame(n_frames):
+    buffer = FrameRingBuffer(capacity=8, n_receivers=2)
+    append_frames(buffer, 0, n_frames)
+
+    timestamps, sensor_data, positions, cursor, n_overwritten = buffer.frames_since(0)
+    expected = np.arange(n_frames - 7, n_frames)
+    assert cursor == n_frames and n_overwritten == n_frames - 7
+
+    # the writer adds a frame while the consumer still iterates over the view
+    append_frames(buffer, n_frames, n_frames + 1)
+
+    np.testing.assert_array_equal(timestamps, expected)
+    np.testing.assert_array_equal(sensor_data[:, 1, 1], expected)
+    np.testing.assert_array_equal(positions[:, 2], expected)
+
+
+def test_window():
+    buffer = FrameRingBuffer(capacity=8, n_receivers=1)
+    append_frames(buffer, 0, 12)
+
+    timestamps, _, _ = buffer.window(0., 7.)
+    np.testing.assert_array_equal(timestamps, [5, 6]) # older frames were overwritten
+
+    np.testing.assert_array_equal(buffer.window(9., 11.)[0], [9, 10])
+    assert buffer.latest_frame()[0] == 11.
+
+
+def test_capacity():
+    with pytest.raises(ValueError):
+        FrameRingBuffer(capacity=1, n_receivers=2)
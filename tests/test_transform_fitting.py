@@ -0,0 +1,142 @@
+"""
+Tests of the robust device-to-head fit on simulated sensors above a spherical scalp with a known transform.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+from scipy.spatial.transform import Rotation
+
+from OPM_lab.transform_fitting import apply_trans, fit_rigid, ransac_matched_points, fit_device_to_head
+
+SCALP_RADIUS = 0.09
+SCALP_OFFSET = 0.006
+
+
+def hemisphere(n_points: int, rng):
+    directions = rng.normal(size=(n_points, 3))
+    directions[:, 2] = np.abs(directions[:, 2])
+    return directions / np.linalg.norm(directions, axis=1, keepdims=True)
+
+
+def random_transform(rng):
+    trans = np.eye(4)
+    trans[:3, :3] = Rotation.from_euler("xyz", rng.uniform(-20, 20, 3), degrees=True).as_matrix()
+    trans[:3, 3] = rng.uniform(-0.05, 0.05, 3)
+    return trans
+
+
+def simulate(seed: int = 0, n_sensors: int = 60, n_head_points: int = 3000, noise: float = 0.001):
+    """
+    Sensors SCALP_OFFSET above a spherical scalp, digitised with noise, and noisy head-shape points on the scalp.
+
+    Returns:
+        dict: The true device-to-head transform, the sensor positions and normals in device space, the true and the
+        digitised sensor positions in head space and the head-shape points.
+    """
+    rng = np.random.default_rng(seed)
+    directions = hemisphere(n_sensors, rng)
+    sensors_head = directions * (SCALP_RADIUS + SCALP_OFFSET)
+
+    trans = random_transform(rng)
+    inverse = np.linalg.inv(trans)
+
+    return {
+        "trans": trans,
+        "sensors_device": apply_trans(inverse, sensors_head),
+        "sensor_normals": directions @ inverse[:3, :3].T,
+        "sensors_head": sensors_head,
+        "digitised": sensors_head + rng.normal(scale=noise, size=sensors_head.shape),
+        "head_points": SCALP_RADIUS * hemisphere(n_head_points, rng) + rng.normal(scale=noise, size=(n_head_points, 3)),
+    }
+
+
+def mean_sensor_error(trans, sim):
+    return np.mean(np.linalg.norm(apply_trans(trans, sim["sensors_device"]) - sim["sensors_head"], axis=1))
+
+
+def test_fit_rigid_exact():
+    sim = simulate(noise=0)
+    np.testing.assert_allclose(fit_rigid(sim["sensors_device"], sim["sensors_head"]), sim["trans"], atol=1e-10)
+
+
+def test_ransac_rejects_outliers():
+    sim = simulate(noise=0)
+    target = sim["sensors_head"].copy()
+    outliers = np.array([3, 17, 42])
+    target[outliers] += [0.03, -0.02, 0.01]
+
+    trans, inliers = ransac_matched_points(sim["sensors_device"], target)
+
+    np.testing.assert_allclose(trans, sim["trans"], atol=1e-10)
+    np.testing.assert_array_equal(np.flatnonzero(~inliers), outliers)
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_icp_does_not_pull_sensors_onto_scalp(seed):
+    sim = simulate(seed)
+    ransac_trans = fit_device_to_head(sim["sensors_device"], sim["digitised"])[0]
+    trans, inliers, residuals, surface_residuals = fit_device_to_head(
+        sim["sensors_device"], sim["digitised"], sim["head_points"],
+        sensor_normals=sim["sensor_normals"], scalp_offset=SCALP_OFFSET
+    )
+
+    assert inliers.all()
+    assert mean_sensor_error(trans, sim) < 0.0006
+    assert mean_sensor_error(trans, sim) < mean_sensor_error(ransac_trans, sim) + 0.0002
+    # the sensors stay above the scalp
+    np.testing.assert_allclose(np.median(surface_residuals), SCALP_OFFSET, atol=0.0015)
+    assert residuals.shape == (len(sim["sensors_device"]),)
+
+
+def test_icp_with_outliers():
+    sim = simulate()
+    rng = np.random.default_rng(1)
+
+    digitised = sim["digitised"].copy()
+    digitised[[5, 25]] += [0.02, 0.02, -0.02]
+    # stray head-shape points, e.g. the stylus lifted off the scalp
+    stray = SCALP_RADIUS * hemisphere(150, rng) * rng.uniform(1.1, 1.3, (150, 1))
+    head_points = np.concatenate([sim["head_points"], stray])
+
+    trans, inliers, residuals, _ = fit_device_to_head(
+        sim["sensors_device"], digitised, head_points, sensor_normals=-sim["sensor_normals"], scalp_offset=SCALP_OFFSET
+    )
+
+    np.testing.assert_array_equal(np.flatnonzero(~inliers), [5, 25])
+    assert mean_sensor_error(trans, sim) < 0.0006
+    assert np.all(residuals[[5, 25]] > 0.02)
+
+
+def test_without_scalp_offset_keeps_ransac_fit():
+    sim = simulate()
+    ransac_trans = fit_device_to_head(sim["sensors_device"], sim["digitised"])[0]
+    trans, _, _, surface_residuals = fit_device_to_head(sim["sensors_device"], sim["digitised"], sim["head_points"])
+
+    np.testing.assert_array_equal(trans, ransac_trans)
+    assert np.isfinite(surface_residuals).all()
+
+
+def test_add_device_to_head_refine():
+    mne = pytest.importorskip("mne")
+    from OPM_lab.mne_integration import add_device_to_head
+
+    sim = simulate(n_sensors=30)
+    labels = [f"OPM{idx:03d}" for idx in range(30)]
+    info = mne.create_info(labels, 1000., "mag")
+    for ch, pos, normal in zip(info["chs"], sim["sensors_device"], sim["sensor_normals"]):
+        ch["loc"][:3] = pos
+        ch["loc"][9:12] = normal
+    raw = mne.io.RawArray(np.zeros((30, 10)), info, verbose=False)
+
+    digitised = sim["digitised"].copy()
+    digitised[7] += 0.03
+    df = pd.concat([
+        pd.DataFrame({"category": "OPM", "label": labels}),
+        pd.DataFrame({"category": "head", "label": "head"}, index=range(len(sim["head_points"]))),
+    ], ignore_index=True)
+    df[["x", "y", "z"]] = np.concatenate([digitised, sim["head_points"]])
+
+    report = add_device_to_head(raw, df, refine=True, scalp_offset=SCALP_OFFSET)
+
+    assert report["rejected"] == ["OPM007"]
+    assert mean_sensor_error(raw.info["dev_head_t"]["trans"], sim) < 0.0006